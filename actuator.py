@@ -0,0 +1,292 @@
+"""
+actuator.py — single thread that owns all hotkey input.
+
+- Callers submit key sequences (lists of chords like ("shift", "w")) with a priority.
+- One actuator thread drains a priority queue, so keystrokes from different
+  trades never interleave and a trade fire always goes before pending amount resets.
+- pyautogui's global PAUSE is bypassed; a configurable per-key delay is used instead.
+- Every job returns a Future resolving to the seconds it took to send; fire
+  durations are kept in a histogram for /latency-style reporting.
+- fire(..., at=) times the trade key: the martingale increase goes out at once,
+  the backend is checked, then the thread precise-waits (scheduler.precise_wait)
+  until `at` minus the lead and sends the key. The lead compensates for the
+  time the key itself takes to send: FIRE_LEAD_MS, or "auto" for the measured
+  median. The achieved offset (key sent minus `at`) is reported per fire.
+  A timed key that could only go out more than MAX_FIRE_LATE after `at` is
+  not sent (the job fails).
+- fire(..., gate=) asks gate("increase") right before the increase and
+  gate("key") right before the trade key; False aborts with FireAborted. The
+  caller records the increase inside the gate, atomically with its own
+  decision to cancel, and undoes a recorded increase when the fire fails.
+
+Backends (tried in order, the next one is the fallback):
+- CdpKeyBackend: Input.dispatchKeyEvent on the already-open WebDriver session.
+  Needs no X server, so Chrome can run true --headless=new.
+- PyAutoGuiBackend: synthetic X11 keystrokes (needs Xvfb/DISPLAY).
+"""
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import pyautogui
+except Exception:  # no X display (headless/CDP-only deployments)
+    pyautogui = None
+
+from latency import Histogram
+from driver_owner import set_thread_priority, PRIORITY_TRADE
+from scheduler import precise_wait
+
+logger = logging.getLogger(__name__)
+
+KEY_DELAY = 0.02  # seconds between chords in one sequence
+ACTUATION_BACKEND = os.getenv("ACTUATION_BACKEND", "cdp")  # "cdp" (pyautogui fallback) or "pyautogui"
+FIRE_LEAD_MS = os.getenv("FIRE_LEAD_MS", "auto")  # ms the trade key starts before its target, or "auto"
+MAX_AUTO_LEAD = 0.25  # cap on the measured lead, so one stalled send cannot pull fires far early
+MAX_FIRE_LATE = 0.5   # a timed trade key this far past its target is dropped, never sent
+
+# Priorities (lower runs first)
+PRIORITY_FIRE = 0
+PRIORITY_INCREASE = 1
+PRIORITY_RESET = 5
+
+# Platform hotkeys
+BUY = ("shift", "w")
+SELL = ("shift", "s")
+INCREASE = ("shift", "d")
+DECREASE = ("shift", "a")
+
+
+class FireAborted(Exception):
+    """The fire's gate refused the increase or the trade key (the trade was called off)."""
+
+
+@dataclass(frozen=True, slots=True)
+class FireReport:
+    elapsed: float                  # seconds spent sending (excluding the wait for `at`)
+    offset: Optional[float] = None  # trade key sent minus target, seconds; None if untimed
+
+
+# -----------------
+# Backends
+# -----------------
+class PyAutoGuiBackend:
+    name = "pyautogui"
+
+    def available(self):
+        return pyautogui is not None
+
+    def send_chord(self, chord):
+        *mods, key = chord
+        for m in mods:
+            pyautogui.keyDown(m, _pause=False)
+        try:
+            pyautogui.press(key, _pause=False)
+        finally:
+            for m in reversed(mods):
+                pyautogui.keyUp(m, _pause=False)
+
+
+# CDP key descriptions: name -> (key, code, windowsVirtualKeyCode, modifier bit)
+_CDP_KEYS = {
+    "shift": ("Shift", "ShiftLeft", 16, 8),
+    "ctrl": ("Control", "ControlLeft", 17, 2),
+    "alt": ("Alt", "AltLeft", 18, 1),
+}
+
+
+class CdpKeyBackend:
+    name = "cdp"
+
+    def __init__(self, get_driver):
+        self._get_driver = get_driver  # callable, so a replaced driver is picked up
+
+    def available(self):
+        driver = self._get_driver()
+        return driver is not None and hasattr(driver, "execute_cdp_cmd")
+
+    def send_chord(self, chord):
+        driver = self._get_driver()
+        *mods, key = chord
+        modifiers = 0
+        for m in mods:
+            k, code, vk, bit = _CDP_KEYS[m]
+            modifiers |= bit
+            driver.execute_cdp_cmd("Input.dispatchKeyEvent", {
+                "type": "rawKeyDown", "key": k, "code": code,
+                "windowsVirtualKeyCode": vk, "modifiers": modifiers,
+            })
+        k, code, vk = self._describe(key, modifiers)
+        event = {"key": k, "code": code, "windowsVirtualKeyCode": vk, "modifiers": modifiers}
+        try:
+            driver.execute_cdp_cmd("Input.dispatchKeyEvent", dict(event, type="rawKeyDown"))
+            driver.execute_cdp_cmd("Input.dispatchKeyEvent", dict(event, type="keyUp"))
+        finally:
+            for m in reversed(mods):
+                k, code, vk, bit = _CDP_KEYS[m]
+                modifiers &= ~bit
+                driver.execute_cdp_cmd("Input.dispatchKeyEvent", {
+                    "type": "keyUp", "key": k, "code": code,
+                    "windowsVirtualKeyCode": vk, "modifiers": modifiers,
+                })
+
+    @staticmethod
+    def _describe(key, modifiers):
+        upper = key.upper()
+        shown = upper if modifiers & 8 else key.lower()
+        return shown, f"Key{upper}", ord(upper)
+
+
+def default_backends(get_driver=None):
+    backends = []
+    if ACTUATION_BACKEND == "cdp" and get_driver is not None:
+        backends.append(CdpKeyBackend(get_driver))
+    backends.append(PyAutoGuiBackend())
+    return backends
+
+
+class InputActuator:
+    def __init__(self, backends=None, key_delay=KEY_DELAY):
+        self.backends = backends or default_backends()
+        self.key_delay = key_delay
+        self.fire_hist = Histogram()
+        self.key_hist = Histogram()      # send time of the trade key alone (the auto lead)
+        self.offsets = deque(maxlen=200)
+        self.fixed_lead = None if FIRE_LEAD_MS == "auto" else float(FIRE_LEAD_MS) / 1000
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._thread = threading.Thread(target=self._run, name="input-actuator", daemon=True)
+        self._thread.start()
+
+    # -----------------
+    # Submission API
+    # -----------------
+    def submit(self, chords, priority=PRIORITY_RESET, label=None, at=None, gate=None) -> Future:
+        future = Future()
+        self._queue.put((priority, next(self._seq), list(chords), label, future, at, gate))
+        return future
+
+    def fire(self, direction, increase=False, at=None, gate=None) -> Future:
+        """
+        Optional martingale increase plus the trade key, sent as one coalesced
+        sequence. With `at` (monotonic seconds) the trade key lands on that
+        instant; with `gate` either part can still be called off. Resolves to
+        a FireReport.
+        """
+        chords = [INCREASE] if increase else []
+        chords.append(BUY if direction.upper() == 'BUY' else SELL)
+        return self.submit(chords, PRIORITY_FIRE, label=f"fire {direction}", at=at, gate=gate)
+
+    def lead(self):
+        """Seconds before the target the trade key starts sending."""
+        if self.fixed_lead is not None:
+            return self.fixed_lead
+        measured = self.key_hist.percentile(50)
+        return min(measured, MAX_AUTO_LEAD) if measured is not None else 0.0
+
+    def reset_amount(self, increases) -> Future:
+        return self.submit([DECREASE] * increases, PRIORITY_RESET, label=f"reset x{increases}")
+
+    def stats(self):
+        offsets = [abs(o) for o in self.offsets]
+        return {
+            **self.fire_hist.summary(),
+            "lead_ms": round(self.lead() * 1000, 2),
+            "offset_mean_ms": round(sum(offsets) / len(offsets) * 1000, 2) if offsets else None,
+            "offset_max_ms": round(max(offsets) * 1000, 2) if offsets else None,
+        }
+
+    # -----------------
+    # Actuator loop
+    # -----------------
+    def _run(self):
+        set_thread_priority(PRIORITY_TRADE)  # CDP key events jump the WebDriver queue
+        while True:
+            priority, _, chords, label, future, at, gate = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if priority == PRIORITY_FIRE:
+                    elapsed, offset = self._send_fire(chords, at, gate)
+                else:
+                    elapsed, offset = self._send_sequence(chords), None
+            except FireAborted as e:
+                logger.info(f"[⏹️] {label} called off: {e}")
+                future.set_exception(e)
+                continue
+            except Exception as e:
+                logger.error(f"[❌] Actuator failed on {label}: {e}")
+                future.set_exception(e)
+                continue
+            if priority == PRIORITY_FIRE:
+                self.fire_hist.record(elapsed)
+                future.set_result(FireReport(elapsed, offset))
+            else:
+                future.set_result(elapsed)
+            logger.debug(f"[⌨️] {label} sent in {elapsed * 1000:.1f}ms"
+                         + (f", {offset * 1000:+.1f}ms from target" if offset is not None else ""))
+
+    def _send_sequence(self, chords, backends=None):
+        started = time.monotonic()
+        for i, chord in enumerate(chords):
+            if i:
+                time.sleep(self.key_delay)
+            self._send_chord(chord, backends)
+        return time.monotonic() - started
+
+    def _send_fire(self, chords, at=None, gate=None):
+        """Everything but the last chord now; the last one so that it finishes at `at` (or right after)."""
+        *before, key = chords
+        self._check_late(at)
+        elapsed = 0.0
+        if before:
+            if gate and not gate("increase"):
+                raise FireAborted("increase refused")
+            elapsed = self._send_sequence(before)
+            time.sleep(self.key_delay)
+        ready = [b for b in self.backends if b.available()]
+        if not ready:
+            raise RuntimeError("no actuation backend available")
+        if at is not None:
+            precise_wait(at - self.lead())
+            self._check_late(at)
+        if gate and not gate("key"):
+            raise FireAborted("trade key refused")
+        started = time.monotonic()
+        self._send_chord(key, ready)
+        sent = time.monotonic()
+        if at is None:
+            return elapsed + (sent - started), None
+        self.key_hist.record(sent - started)
+        offset = sent - at
+        self.offsets.append(offset)
+        return elapsed + (sent - started), offset
+
+    @staticmethod
+    def _check_late(at):
+        if at is None:
+            return
+        late = time.monotonic() - at
+        if late > MAX_FIRE_LATE:
+            raise RuntimeError(f"trade key would be {late * 1000:.0f}ms past its target; not sent")
+
+    def _send_chord(self, chord, backends=None):
+        last_error = None
+        for backend in backends or self.backends:
+            if not backend.available():
+                continue
+            try:
+                backend.send_chord(chord)
+                return
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[⚠️] {backend.name} backend failed for {chord}: {e}; trying fallback.")
+        raise last_error or RuntimeError("no actuation backend available")
@@ -3,10 +3,23 @@ import threading
 import random
 import logging
 import json
+from collections import OrderedDict
+from functools import partial
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
-import pytz
 
 from selenium_integration import PocketOptionSelenium
+from scheduler import TradeScheduler
+from trade_store import TradeStore
+from models import Signal, Trade, TradeResult
+from signal_time import signal_clock
+from latency import latency, now
+from prearm import PrearmPipeline, PREARM_WORKERS
+from actuator import InputActuator, FireAborted, default_backends
+from ws_listener import ResultEvent, TickEvent
+from lean_browser import LEAN_BROWSER, BENCHMARK_SECONDS, benchmark
+from memory_watchdog import MEMORY_WATCHDOG, MemoryWatchdog
+from result_bus import ResultBus, BusResult
 
 # -------------------------
 # Logging
@@ -27,6 +40,13 @@ except Exception:
         "Desmond's bot is on duty — targets locked.",
     ]
 
+LATE_TOLERANCE = 2.0  # seconds a scheduled entry may fire late before it is skipped
+COMPACTION_INTERVAL = 60  # seconds between trade ledger compactions
+FIRE_TIMEOUT = 2.0  # seconds to wait for the actuator to report a trade fire
+RESET_TIMEOUT = 5.0  # seconds to wait for the actuator to send an amount reset
+CLOSED_CHAINS_MAX = 1000  # finished signal chains remembered so their in-flight fires are called off
+PREFIRE_SECONDS = 1.0  # entries are dispatched this early; the actuator holds the key until T-0
+
 def random_log():
     return random.choice(LOG_MESSAGES) if LOG_MESSAGES else ""
 
@@ -34,31 +54,7 @@ def random_log():
 # Timezone conversion helper
 # -------------------------
 def convert_signal_time(entry_time_val, source_tz_str):
-    if isinstance(entry_time_val, datetime):
-        return entry_time_val
-    fmt = "%H:%M"
-    try:
-        entry_dt_naive = datetime.strptime(entry_time_val, fmt)
-        tz_lower = source_tz_str.lower().strip()
-        if tz_lower == "cameroon":
-            src = pytz.timezone("Africa/Douala")
-        elif tz_lower == "utc-4":
-            src = pytz.FixedOffset(-240)
-        elif tz_lower == "utc-3":
-            src = pytz.FixedOffset(-180)
-        else:
-            try:
-                src = pytz.timezone(source_tz_str)
-            except:
-                src = pytz.UTC
-        now_src = datetime.now(pytz.utc).astimezone(src)
-        entry_dt = datetime.combine(now_src.date(), entry_dt_naive.time())
-        entry_dt = src.localize(entry_dt) if entry_dt.tzinfo is None else entry_dt
-        if entry_dt < now_src:
-            return None
-        return entry_dt
-    except Exception:
-        return None
+    return signal_clock.resolve(entry_time_val, source_tz_str)
 
 # -------------------------
 # TradeManager
@@ -68,10 +64,20 @@ class TradeManager:
         self.base_amount = base_amount
         self.max_martingale = max_martingale
         self.trading_active = True
-        self.pending_trades = []
-        self.pending_lock = threading.Lock()
-        self.increase_counts = {}
+        self.trades = TradeStore()
+        self.last_prices = {}  # asset -> (ts, price) from WebSocket ticks
+        self._closed_chains = OrderedDict()  # chain id -> None, set under the asset's book lock
+        self.scheduler = TradeScheduler()
+        self.results = ResultBus(self._on_bus_result)  # fed by the WebSocket listener / DOM feed
+        threading.Thread(target=self._compaction_loop, daemon=True).start()
         self.selenium = PocketOptionSelenium(self, headless=True)
+        self.actuator = InputActuator(default_backends(lambda: self.selenium.driver))
+        # Pre-arm stages block on UI work for seconds; their own pool keeps fire workers free
+        self.prearm = PrearmPipeline(TradeScheduler(PREARM_WORKERS, name="prearm-scheduler"), self.selenium)
+        self.memory_watchdog = None
+        if MEMORY_WATCHDOG:
+            self.memory_watchdog = MemoryWatchdog(self.selenium, self.trades, self.scheduler.next_fire_in)
+            self.memory_watchdog.start()
         logger.info(f"TradeManager initialized | base_amount: {base_amount}, max_martingale: {max_martingale}")
 
     # -----------------
@@ -87,74 +93,114 @@ class TradeManager:
             logger.info("[⏹️] Trading stopped.")
         elif cmd.startswith("/status"):
             logger.info("[ℹ️] Trading status: ACTIVE" if self.trading_active else "[ℹ️] Trading status: PAUSED")
+            for entry in self.scheduler.pending() + self.prearm.scheduler.pending():
+                logger.info(f"[🗓️] Queued: {entry['label']} in {entry['seconds_left']:.1f}s")
+            for t in self.trades.recent(10):
+                logger.info(f"[📒] {t.id} -> {t.result.value}")
+        elif cmd.startswith("/latency"):
+            latency.dump()
+            logger.info(f"[⌨️] Fire actuation: {self.actuator.stats()}")
+            logger.info(f"[🚦] WebDriver queue: {self.selenium.driver_owner.stats()}")
+            logger.info(f"[🖥️] UI state cache: {self.selenium.ui_state.stats()}")
+            logger.info(f"[📬] Result bus: {self.results.stats()}")
+            logger.info(f"[⌛] Pacing: {self.selenium.pacer.stats()}")
+            logger.info(f"[🗂️] Tab pool: {self.selenium.tab_pool.stats()}")
+            if self.selenium.failover:
+                logger.info(f"[🔀] Failover: {self.selenium.failover.stats()}")
+            if self.memory_watchdog:
+                logger.info(f"[🧠] Memory: {self.memory_watchdog.stats()}")
+        elif cmd.startswith("/lean"):
+            slack = self.scheduler.next_fire_in()
+            if not LEAN_BROWSER:
+                logger.info("[ℹ️] Lean mode is off (LEAN_BROWSER=1 to enable).")
+            elif slack is not None and slack < 2 * BENCHMARK_SECONDS + 10:
+                logger.info(f"[⏸️] Next entry in {slack:.0f}s — lean benchmark postponed.")
+            else:
+                threading.Thread(target=benchmark, args=(self.selenium.driver,), daemon=True).start()
         else:
             logger.info(f"[ℹ️] Unknown command: {cmd}")
 
     # -----------------
     # Signal entrypoint
     # -----------------
-    def handle_signal(self, signal: dict):
+    def handle_signal(self, signal):
         if not self.trading_active:
             logger.info("[⏸️] Trading paused. Ignoring signal.")
             return
 
+        if isinstance(signal, dict):
+            signal = Signal.from_dict(signal)
         logger.info(f"[📡] Received signal: {signal} | {random_log()}")
-        source_tz = signal.get("source", "UTC-3")
 
-        # Convert entry time
-        entry_dt = convert_signal_time(signal.get('entry_time'), source_tz)
+        # Convert entry and martingale times in one pass
+        entry_dt, valid_mg_times = signal_clock.resolve_signal_times(
+            signal.entry_time, signal.martingale_times, signal.source
+        )
         if not entry_dt:
-            logger.warning(f"[⚠️] Invalid or passed entry_time: {signal.get('entry_time')}. Skipping signal.")
+            logger.warning(f"[⚠️] Invalid or passed entry_time: {signal.entry_time}. Skipping signal.")
             return
-        signal['entry_time'] = entry_dt
-
-        # Convert martingale times
-        valid_mg_times = []
-        for t in signal.get('martingale_times', []):
-            t_conv = convert_signal_time(t, source_tz)
-            if t_conv:
-                valid_mg_times.append(t_conv)
-        signal['martingale_times'] = valid_mg_times
+        signal = signal.with_times(entry_dt, valid_mg_times)
+        latency.stamp(signal.stamps, 'scheduled', signal.currency_pair)
 
         # Schedule base trade
-        threading.Thread(target=self.execute_trade, args=(entry_dt, signal, 0), daemon=True).start()
+        self._schedule_trade(entry_dt, signal, 0)
 
         # Schedule martingale trades
-        for i, mg in enumerate(signal['martingale_times']):
+        for i, mg in enumerate(signal.martingale_times):
             level = i + 1
             if level > self.max_martingale:
                 logger.warning(f"[⚠️] Martingale level {level} exceeds max {self.max_martingale}. Skipping.")
                 break
-            threading.Thread(target=self.execute_trade, args=(mg, signal, level), daemon=True).start()
+            self._schedule_trade(mg, signal, level)
+
+    def _schedule_trade(self, entry_dt, signal, martingale_level):
+        currency = signal.currency_pair
+        logger.info(f"[⏰] Scheduled {currency} level {martingale_level} for {entry_dt.strftime('%H:%M')}")
+        self.prearm.arm(signal, entry_dt)
+        return self.scheduler.schedule(
+            entry_dt - timedelta(seconds=PREFIRE_SECONDS), self.execute_trade, entry_dt, signal, martingale_level,
+            priority=martingale_level,
+            label=f"{currency}@{entry_dt.strftime('%H:%M')} L{martingale_level}",
+            tag=signal.chain_id(),
+        )
 
     # -----------------
     # Execute a single trade
     # -----------------
     def execute_trade(self, entry_dt, signal, martingale_level):
-        delay = (entry_dt - datetime.now(entry_dt.tzinfo)).total_seconds()
-        if delay > 0:
-            fmt = "%H:%M"
-            logger.info(f"[⏰] Waiting {delay:.1f}s until {entry_dt.strftime(fmt)} (level {martingale_level}) for {signal['currency_pair']}")
-            time.sleep(delay)
-        else:
-            logger.info(f"[⏹️] Signal entry time {entry_dt.strftime('%H:%M')} passed. Skipping trade for {signal['currency_pair']}.")
+        stamps = dict(signal.stamps)
+        stamps['fired'] = now()
+        late = (datetime.now(entry_dt.tzinfo) - entry_dt).total_seconds()
+        latency.observe('fired', signal.currency_pair, late + PREFIRE_SECONDS)  # vs the dispatch time
+        if late > LATE_TOLERANCE:
+            logger.info(f"[⏹️] Signal entry time {entry_dt.strftime('%H:%M')} passed. Skipping trade for {signal.currency_pair}.")
             return
 
-        currency = signal['currency_pair']
-        direction = signal.get('direction', 'BUY')
-        timeframe = signal.get('timeframe', 'M1')
+        currency = signal.currency_pair
 
         # Martingale check
         if martingale_level > 0:
-            with self.pending_lock:
-                for t in self.pending_trades:
-                    if t['currency_pair'] == currency and t['level'] == 0 and t['resolved'] and t['result'] == 'WIN':
-                        logger.info(f"[⏹️] Base trade WIN — skipping martingale level {martingale_level}.")
-                        return
+            if self.trades.base_won(currency):
+                logger.info(f"[⏹️] Base trade WIN — skipping martingale level {martingale_level}.")
+                return
 
-        # Selenium readiness (with last 20s check)
+        # The asset's tab is held from the check until the keys are out
+        with self.selenium.holding_asset(currency):
+            self._confirm_and_fire(entry_dt, signal, martingale_level, stamps)
+
+    def _confirm_and_fire(self, entry_dt, signal, martingale_level, stamps):
+        currency = signal.currency_pair
+        direction = signal.direction
+        timeframe = signal.timeframe
+
+        # Always re-check (from the UI state cache when it is fresh): another signal's
+        # pre-arm or a pooled-tab switch may have moved the chart since verify
+        armed = self.prearm.is_armed(currency, entry_dt)
         ready_info = self.selenium.confirm_asset_ready(currency, entry_dt, timeframe)
+        latency.stamp(stamps, 'asset_confirmed', currency)
         if not ready_info['ready']:
+            if armed:
+                logger.warning(f"[⚠️] {currency} was pre-armed but the chart has moved off it since.")
             logger.warning(f"[⚠️] Signal missed or asset not ready for {currency} at {entry_dt.strftime('%H:%M')}. Skipping trade.")
             return
 
@@ -162,94 +208,162 @@ class TradeManager:
         trade_id = f"{currency}_{entry_dt.strftime('%H%M')}_{martingale_level}_{int(time.time()*1000)}"
         logger.info(f"[🎯] READY to place trade {trade_id} — {direction} level {martingale_level}")
 
-        with self.pending_lock:
-            pending = {
-                'id': trade_id,
-                'currency_pair': currency,
-                'entry_dt': entry_dt,
-                'level': martingale_level,
-                'placed_at': None,
-                'resolved': False,
-                'result': None,
-                'increase_count': 0
-            }
-            self.pending_trades.append(pending)
-
-        # Martingale increase
-        if martingale_level > 0:
-            pyautogui.keyDown('shift'); pyautogui.press('d'); pyautogui.keyUp('shift')
-            with self.pending_lock:
-                pending['increase_count'] += 1
-                self.increase_counts[currency] = self.increase_counts.get(currency, 0) + 1
+        pending = Trade(trade_id, currency, entry_dt, martingale_level, timeframe=timeframe,
+                        chain=signal.chain_id(), stamps=stamps)
 
-        # Fire trade hotkey
+        # Martingale increase now, trade hotkey on the entry instant (actuator thread)
+        wait = max(0.0, (entry_dt - datetime.now(entry_dt.tzinfo)).total_seconds())
+        called_off = threading.Event()
+        fire = self.actuator.fire(direction, increase=martingale_level > 0, at=now() + wait,
+                                  gate=partial(self._fire_gate, pending, called_off))
         try:
-            if direction.upper() == 'BUY':
-                pyautogui.keyDown('shift'); pyautogui.press('w'); pyautogui.keyUp('shift')
-            else:
-                pyautogui.keyDown('shift'); pyautogui.press('s'); pyautogui.keyUp('shift')
+            report = fire.result(timeout=FIRE_TIMEOUT + wait)
         except Exception as e:
-            logger.error(f"[❌] Error sending trade hotkey for {trade_id}: {e}")
+            self._fire_failed(pending, fire, called_off, e)
+            return
+        pending.fire_offset_ms = round(report.offset * 1000, 2)
+        logger.info(f"[⌨️] Trade keys for {trade_id} sent in {report.elapsed * 1000:.0f}ms, "
+                    f"{pending.fire_offset_ms:+.1f}ms from entry")
+        self.trades.add(pending)
+        latency.stamp(stamps, 'hotkey_sent', currency)
 
-        with self.pending_lock:
-            pending['placed_at'] = datetime.now(entry_dt.tzinfo)
+        self.trades.mark_placed(pending, datetime.now(entry_dt.tzinfo))
+        latency.stamp(stamps, 'placed', currency)
 
-        # Watch trade result via Selenium
-        self.selenium.watch_trade_for_result(currency, pending['placed_at'])
+        # The result bus delivers this trade's result once it has expired
+        self.results.subscribe(pending)
         logger.info(f"[📝] Trade placed: {trade_id} — awaiting result. {random_log()}")
 
+    def _fire_gate(self, trade, called_off, stage):
+        """Actuator callback right before the increase / trade key; decided under the asset's lock."""
+        book = self.trades.book(trade.currency_pair)
+        with book.lock:
+            if called_off.is_set() or trade.chain in self._closed_chains:
+                return False
+            if trade.level > 0 and self.trades.base_won(trade.currency_pair):
+                return False
+            if stage == "increase":
+                # recorded before it is sent, so a WIN decided meanwhile resets it too
+                self.trades.record_increase(trade)
+            return True
+
+    def _fire_failed(self, trade, fire, called_off, error):
+        book = self.trades.book(trade.currency_pair)
+        with book.lock:
+            called_off.set()  # a job still running sends no further increase or key
+            # an increase of a closed chain was counted in that chain's reset
+            undo = trade.increase_count > 0 and trade.chain not in self._closed_chains
+            if undo:
+                self.trades.undo_increase(trade)
+        fire.cancel()  # a job still queued never runs
+        if isinstance(error, FireAborted):
+            logger.info(f"[⏹️] Trade {trade.id} called off before the trade key ({error}).")
+        elif isinstance(error, FutureTimeout):
+            logger.error(f"[❌] Trade hotkey for {trade.id} not sent within {FIRE_TIMEOUT}s. Trade skipped.")
+        else:
+            logger.error(f"[❌] Error sending trade hotkey for {trade.id}: {error}. Trade not placed.")
+        if undo:
+            self._reset_amount(trade.currency_pair, 1)
+
     # -----------------
     # Trade result callback
     # -----------------
-    def on_trade_result(self, currency_pair: str, result: str):
-        logger.info(f"[📣] Result callback: {currency_pair} -> {result}")
-        with self.pending_lock:
-            pending = None
-            for t in sorted(self.pending_trades, key=lambda x: x['placed_at'] or datetime.max):
-                if t['currency_pair'] == currency_pair and not t['resolved'] and t['placed_at']:
-                    pending = t
-                    break
+    def on_trade_result(self, currency_pair: str, result: str, trade_id=None):
+        logger.info(f"[📣] Result callback: {currency_pair} -> {result}" + (f" ({trade_id})" if trade_id else ""))
+        result = TradeResult(result)
+
+        # Decide under the asset's lock only; hotkeys are sent after it is released
+        resets = 0
+        book = self.trades.book(currency_pair)
+        with book.lock:
+            if trade_id:
+                pending = self.trades.resolve(trade_id, result)
+            else:
+                pending = self.trades.resolve_next(currency_pair, result)
             if not pending:
                 logger.info(f"[ℹ️] No pending trade matched for {currency_pair}")
                 return
-            pending['resolved'] = True
-            pending['result'] = result
-
-        # Handle WIN / LOSS
-        if result == 'WIN':
-            with self.pending_lock:
-                incs = self.increase_counts.get(currency_pair, 0)
-                for _ in range(incs):
-                    pyautogui.keyDown('shift'); pyautogui.press('a'); pyautogui.keyUp('shift'); time.sleep(0.05)
-                self.increase_counts[currency_pair] = 0
-                for t in self.pending_trades:
-                    if t['currency_pair'] == currency_pair and not t['resolved']:
-                        t['resolved'] = True
-                        t['result'] = 'SKIPPED_AFTER_WIN'
-        elif result == 'LOSS':
-            with self.pending_lock:
-                increases_done = self.increase_counts.get(currency_pair, 0)
-            if increases_done >= self.max_martingale:
-                with self.pending_lock:
-                    incs = self.increase_counts.get(currency_pair, 0)
-                    for _ in range(incs):
-                        pyautogui.keyDown('shift'); pyautogui.press('a'); pyautogui.keyUp('shift'); time.sleep(0.05)
-                    self.increase_counts[currency_pair] = 0
-                    for t in self.pending_trades:
-                        if t['currency_pair'] == currency_pair and not t['resolved']:
-                            t['resolved'] = True
-                            t['result'] = 'ABORTED_MAX_MARTINGALE'
+            latency.stamp(pending.stamps, 'result', currency_pair)
+            closed = [pending]
+            chain_done = True
+            if result is TradeResult.WIN:
+                resets = self.trades.take_increases(currency_pair)
+                closed += self.trades.resolve_open(currency_pair, TradeResult.SKIPPED_AFTER_WIN, pending.chain)
+            elif result is TradeResult.LOSS and book.increase_count >= self.max_martingale:
+                resets = self.trades.take_increases(currency_pair)
+                closed += self.trades.resolve_open(currency_pair, TradeResult.ABORTED_MAX_MARTINGALE, pending.chain)
+            else:
+                chain_done = False
+            if chain_done and pending.chain:
+                self._closed_chains[pending.chain] = None
+                if len(self._closed_chains) > CLOSED_CHAINS_MAX:
+                    self._closed_chains.popitem(last=False)
+
+        # Trades closed here (not by their own bus delivery) must not keep a subscription
+        for trade in closed:
+            self.results.unsubscribe(trade.id)
+        if not chain_done:
+            return
+
+        # Only this signal's chain: a later signal on the same asset keeps its entries
+        cancelled = 0
+        if pending.chain:
+            cancelled = self.scheduler.cancel_tag(pending.chain)
+            self.prearm.cancel(pending.chain)
+        if cancelled:
+            logger.info(f"[🗓️] Cancelled {cancelled} queued martingale entries for {pending.chain} after {result.value}.")
+        self._reset_amount(currency_pair, resets)
+
+    def _reset_amount(self, asset, increases):
+        if increases:
+            # The wait for the asset's tab runs on the pre-arm pool, not the result thread
+            self.prearm.scheduler.schedule(
+                time.monotonic(), self._send_reset, asset, increases, priority=-2,
+                label=f"reset {asset} x{increases}",
+            )
+
+    def _send_reset(self, asset, increases):
+        with self.selenium.holding_asset(asset):
+            reset = self.actuator.reset_amount(increases)
+            try:
+                reset.result(timeout=RESET_TIMEOUT)
+            except Exception as e:
+                reset.cancel()
+                logger.error(f"[❌] Amount reset x{increases} for {asset} failed: {e or 'timed out'}")
+
+    # -----------------
+    # WebSocket market events (ws_listener.py)
+    # -----------------
+    def on_market_event(self, event):
+        if isinstance(event, TickEvent):
+            self.last_prices[event.asset] = (event.ts, event.price)
+        elif isinstance(event, ResultEvent):
+            event_id = f"ws:{event.deal_id}" if event.deal_id else f"ws:{event.asset}:{event.ts}:{event.profit}"
+            self.results.publish(BusResult(event_id, event.asset, event.result, event.ts, "ws"))
+
+    def _on_bus_result(self, trade_id, asset, result):
+        trade = self.trades.get(trade_id)
+        self.on_trade_result(trade.currency_pair if trade else asset, result, trade_id=trade_id)
 
     # -----------------
     # Cleanup old trades
     # -----------------
     def _cleanup_pending(self):
-        with self.pending_lock:
-            cutoff = datetime.now(pytz.utc) - timedelta(minutes=30)
-            self.pending_trades = [
-                t for t in self.pending_trades
-                if (not t['resolved'] or (t['placed_at'] and t['placed_at'] > cutoff))
-            ]
+        removed = self.trades.compact()
+        if removed:
+            logger.info(f"[🧹] Compacted {len(removed)} old trades ({len(self.trades)} live).")
+        for trade in removed:
+            if trade.result is TradeResult.EXPIRED:
+                self.results.unsubscribe(trade.id)
+        self.results.prune()
+
+    def _compaction_loop(self):
+        while True:
+            time.sleep(COMPACTION_INTERVAL)
+            try:
+                self._cleanup_pending()
+            except Exception as e:
+                logger.error(f"[❌] Trade ledger compaction failed: {e}")
 
 # -----------------
 # Global instance
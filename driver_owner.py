@@ -0,0 +1,162 @@
+"""
+driver_owner.py — one thread owns every WebDriver command.
+
+DriverOwner replaces driver.execute on the live driver, which is the single
+choke point for driver AND WebElement commands (find_element, .text, .click,
+execute_script, execute_cdp_cmd, get_log, ...). Calls from any thread are
+queued and run by the owner thread in priority order:
+
+    PRIORITY_TRADE    trade-critical checks and fires
+    PRIORITY_PREARM   asset/timeframe preparation (default for unmarked threads)
+    PRIORITY_MONITOR  result polling
+
+Threads pick their priority with set_thread_priority() or the command_priority()
+context manager. Monitoring commands may carry stale_after: if they waited longer
+than that in the queue they are dropped (DroppedCommand) instead of delaying
+trade work. Queue wait and run time are recorded per command name.
+
+shutdown() abandons a dead driver: queued commands fail with DriverReplaced
+and the owner thread exits (failover.py installs a new owner on the standby).
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from latency import Histogram
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_TRADE = 0
+PRIORITY_PREARM = 1
+PRIORITY_MONITOR = 2
+MONITOR_STALE_SECONDS = 1.0
+
+_local = threading.local()
+
+
+class DroppedCommand(Exception):
+    """A low-priority command waited past its stale_after and was not sent."""
+
+
+class DriverReplaced(Exception):
+    """The owner was shut down (driver crashed or swapped) before the command ran."""
+
+
+def set_thread_priority(priority, stale_after=None):
+    _local.priority = priority
+    _local.stale_after = stale_after
+
+
+@contextmanager
+def command_priority(priority, stale_after=None):
+    prev = (getattr(_local, "priority", None), getattr(_local, "stale_after", None))
+    set_thread_priority(priority, stale_after)
+    try:
+        yield
+    finally:
+        _local.priority, _local.stale_after = prev
+
+
+def _current():
+    priority = getattr(_local, "priority", None)
+    return (PRIORITY_PREARM if priority is None else priority), getattr(_local, "stale_after", None)
+
+
+class DriverOwner:
+    def __init__(self, driver):
+        self.driver = driver
+        self._raw_execute = driver.execute
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.dropped = 0
+        self._running_since = None   # monotonic start of the command the owner is executing
+        self.wait_hist = {}   # command -> Histogram of queue wait
+        self.run_hist = {}    # command -> Histogram of execution time
+        self._thread = threading.Thread(target=self._run, name="driver-owner", daemon=True)
+        self._thread.start()
+        driver.execute = self.execute
+
+    # -----------------
+    # Replacement for driver.execute
+    # -----------------
+    def execute(self, driver_command, params=None):
+        if threading.current_thread() is self._thread:
+            return self._raw_execute(driver_command, params)
+        if self._closed:
+            raise DriverReplaced(f"{driver_command} sent to a retired driver")
+        priority, stale_after = _current()
+        future = Future()
+        self._queue.put((priority, next(self._seq), driver_command, params, time.monotonic(), stale_after, future))
+        return future.result()
+
+    def detach(self):
+        """Restore the driver's own execute (e.g. before quitting or swapping drivers)."""
+        self.driver.execute = self._raw_execute
+
+    def shutdown(self, reason="driver replaced"):
+        """Detach, fail every queued command and stop the owner thread."""
+        self.detach()
+        self._closed = True
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[2] is not None:
+                item[-1].set_exception(DriverReplaced(f"{item[2]} not sent: {reason}"))
+        self._queue.put((-1, next(self._seq), None, None, time.monotonic(), None, None))
+
+    def busy_for(self):
+        """Seconds the owner has been executing its current command, or None when idle."""
+        since = self._running_since
+        return None if since is None else time.monotonic() - since
+
+    def stats(self):
+        with self._lock:
+            return {
+                "dropped": self.dropped,
+                "queued": self._queue.qsize(),
+                "commands": {
+                    cmd: {"wait": self.wait_hist[cmd].summary(), "run": self.run_hist[cmd].summary()}
+                    for cmd in self.run_hist
+                },
+            }
+
+    # -----------------
+    # Owner loop
+    # -----------------
+    def _run(self):
+        while True:
+            priority, _, command, params, enqueued, stale_after, future = self._queue.get()
+            if command is None:
+                return  # shutdown sentinel
+            waited = time.monotonic() - enqueued
+            if stale_after is not None and waited > stale_after:
+                with self._lock:
+                    self.dropped += 1
+                future.set_exception(DroppedCommand(f"{command} dropped after {waited:.2f}s in queue"))
+                continue
+            started = self._running_since = time.monotonic()
+            try:
+                result = self._raw_execute(command, params)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            self._running_since = None
+            self._record(command, waited, time.monotonic() - started)
+
+    def _record(self, command, waited, ran):
+        with self._lock:
+            if command not in self.run_hist:
+                self.wait_hist[command] = Histogram()
+                self.run_hist[command] = Histogram()
+            self.wait_hist[command].record(waited)
+            self.run_hist[command].record(ran)
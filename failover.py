@@ -0,0 +1,227 @@
+"""
+failover.py — warm standby browser and automatic failover.
+
+Optional (STANDBY_BROWSER=1). A second Chrome is started in the background,
+logged in through the saved session cookies (profile_store.py) and parked on
+the dashboard. A probe thread checks the primary every PROBE_INTERVAL:
+
+- out of band first: the chromedriver process and its /status endpoint (a
+  plain HTTP call, not queued behind other WebDriver commands);
+- then a script through the DriverOwner queue at trade priority.
+
+A dead session (invalid session id, tab crashed, chromedriver gone) fails
+over immediately. A queued probe that does not answer within PROBE_TIMEOUT
+counts as a hang, unless the owner is still inside one command for less than
+COMMAND_HANG_SECONDS (a page load, a reload): that is queue wait, not a dead
+browser. PROBE_TIMEOUT_STRIKES hangs in a row fail over.
+
+Failover fails the commands queued on the dead driver and swaps the standby
+in with PocketOptionSelenium.install_driver (new DriverOwner, per-driver
+state reset, cached asset/timeframe re-applied). The dead browser is quit and
+a new standby is started in the background. The memory watchdog uses the
+same path to recycle a bloated primary.
+"""
+
+import logging
+import os
+import threading
+import time
+import urllib.request
+
+from driver_owner import command_priority, PRIORITY_TRADE
+from profile_store import ProfileStore, DASHBOARD_URL
+
+logger = logging.getLogger(__name__)
+
+STANDBY_BROWSER = os.getenv("STANDBY_BROWSER", "0") == "1"
+PROBE_INTERVAL = 0.5          # seconds between liveness probes of the primary
+PROBE_TIMEOUT = 5.0           # seconds before an unanswered probe counts as a hang
+PROBE_TIMEOUT_STRIKES = 2     # consecutive hangs before failing over
+COMMAND_HANG_SECONDS = 60.0   # a single WebDriver command running longer than this is a hang
+STANDBY_KEEPALIVE = 300       # seconds between standby session checks
+STANDBY_RETRY = 30            # seconds before retrying a failed standby start
+
+_FATAL_MARKERS = (
+    "invalid session id", "no such window", "tab crashed", "chrome not reachable",
+    "disconnected", "connection refused", "max retries exceeded", "target window already closed",
+    "session deleted", "chromedriver exited",
+)
+
+
+def _is_fatal(error):
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _FATAL_MARKERS)
+
+
+class DriverFailover:
+    def __init__(self, selenium):
+        self.selenium = selenium
+        self.standby = None
+        self.standby_profile = None
+        self.failovers = 0
+        self.last_failover_ms = None
+        self._strikes = 0
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        threading.Thread(target=self._probe_loop, name="driver-probe", daemon=True).start()
+        threading.Thread(target=self._standby_loop, name="driver-standby", daemon=True).start()
+        logger.info("[🩺] Primary liveness probe and standby browser started.")
+
+    def stop(self):
+        self._running = False
+
+    # -----------------
+    # Liveness probe
+    # -----------------
+    def probe(self):
+        """(alive, error) for the primary; a hang reports (False, None)."""
+        alive, error = self._probe_chromedriver()
+        if not alive:
+            return alive, error
+        done = threading.Event()
+        box = {}
+
+        def run():
+            try:
+                with command_priority(PRIORITY_TRADE):
+                    self.selenium.driver.execute_script("return document.readyState")
+            except Exception as e:
+                box['error'] = e
+            done.set()
+
+        threading.Thread(target=run, name="driver-probe-call", daemon=True).start()
+        if not done.wait(PROBE_TIMEOUT):
+            busy = self.selenium.driver_owner.busy_for()
+            if busy is not None and busy < COMMAND_HANG_SECONDS:
+                return True, None  # queued behind a long command on a chromedriver that answers
+            return False, None
+        error = box.get('error')
+        return error is None, error
+
+    def _probe_chromedriver(self):
+        driver = self.selenium.driver
+        process = getattr(getattr(driver, "service", None), "process", None)
+        if process is not None and process.poll() is not None:
+            return False, RuntimeError(f"chromedriver exited with {process.returncode}")
+        executor = driver.command_executor
+        url = getattr(executor, "_url", None) or getattr(getattr(executor, "_client_config", None),
+                                                         "remote_server_addr", None)
+        if not url:
+            return True, None
+        try:
+            with urllib.request.urlopen(f"{url.rstrip('/')}/status", timeout=PROBE_TIMEOUT) as response:
+                response.read()
+        except Exception as e:
+            if "timed out" in str(e):
+                return False, None
+            return False, e
+        return True, None
+
+    def _probe_loop(self):
+        while self._running:
+            alive, error = self.probe()
+            if alive:
+                self._strikes = 0
+            elif error is not None and _is_fatal(error):
+                logger.error(f"[💥] Primary browser is dead: {error}")
+                self.failover()
+            elif error is None:
+                self._strikes += 1
+                logger.warning(f"[⏳] Primary browser did not answer within {PROBE_TIMEOUT}s ({self._strikes}).")
+                if self._strikes >= PROBE_TIMEOUT_STRIKES:
+                    self.failover()
+            time.sleep(PROBE_INTERVAL)
+
+    # -----------------
+    # Failover
+    # -----------------
+    def failover(self, reason="primary browser failed"):
+        with self._lock:
+            standby, profile = self.standby, self.standby_profile
+            if standby is None:
+                logger.error("[❌] No standby browser ready; trades will fail until the primary recovers.")
+                return False
+            self.standby = self.standby_profile = None
+            started = time.monotonic()
+            sel = self.selenium
+            asset, timeframe = sel.ui_state.asset, sel.ui_state.timeframe
+            old_driver, old_profile = sel.driver, sel.profile
+            sel.driver_owner.shutdown(reason)
+            sel.install_driver(standby, profile, asset, timeframe)
+
+            self._strikes = 0
+            self.failovers += 1
+            self.last_failover_ms = round((time.monotonic() - started) * 1000, 1)
+            logger.warning(f"[🔀] Switched to the standby browser in {self.last_failover_ms}ms ({reason}; "
+                           f"restored {asset or '-'} {timeframe or '-'}).")
+        threading.Thread(target=self._retire, args=(old_driver, old_profile), daemon=True).start()
+        return True
+
+    def standby_ready(self):
+        return self.standby is not None
+
+    @staticmethod
+    def _retire(driver, profile):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"[⚠️] Quitting the failed browser raised: {e}")
+        profile.release()
+
+    # -----------------
+    # Standby keeper
+    # -----------------
+    def _standby_loop(self):
+        last_check = 0.0
+        while self._running:
+            if self.standby is None:
+                self._start_standby()
+                last_check = time.monotonic()
+            elif time.monotonic() - last_check >= STANDBY_KEEPALIVE:
+                self._keepalive()
+                last_check = time.monotonic()
+            time.sleep(STANDBY_RETRY if self.standby is None else PROBE_INTERVAL * 10)
+
+    def _start_standby(self):
+        profile = ProfileStore()
+        try:
+            driver = self.selenium.setup_driver(self.selenium.headless, profile=profile)
+        except Exception as e:
+            logger.error(f"[❌] Standby browser failed to start: {e}")
+            profile.release()
+            return
+        if not profile.is_authenticated(driver):
+            driver.get(DASHBOARD_URL)
+        with self._lock:
+            self.standby, self.standby_profile = driver, profile
+        logger.info("[🛟] Standby browser parked on the dashboard.")
+
+    def _keepalive(self):
+        with self._lock:
+            driver, profile = self.standby, self.standby_profile
+        if driver is None:
+            return
+        try:
+            alive = "/cabinet" in driver.current_url or profile.restore_session(driver)
+        except Exception as e:
+            logger.warning(f"[⚠️] Standby browser is gone ({e}); starting a new one.")
+            alive = False
+        if alive:
+            return
+        with self._lock:
+            if self.standby is not driver:
+                return  # promoted by a failover meanwhile
+            self.standby = self.standby_profile = None
+        self._retire(driver, profile)
+
+    def stats(self):
+        return {
+            "standby_ready": self.standby is not None,
+            "failovers": self.failovers,
+            "last_failover_ms": self.last_failover_ms,
+        }
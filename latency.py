@@ -0,0 +1,140 @@
+"""
+latency.py — per-stage latency histograms for the signal -> trade pipeline.
+
+Each signal/trade carries a `stamps` dict of stage -> time.monotonic().
+stamp() records the time since the previous stage that is present, into a
+histogram per stage and per (stage, asset). Histograms use fixed log-spaced
+buckets, so memory stays flat however many trades run.
+
+Stages, in order:
+    received         Telegram handler got the message
+    parsed           parse_signal finished
+    scheduled        handle_signal queued the trade(s)
+    fired            scheduler dispatched the entry (recorded as lateness vs its dispatch time)
+    asset_confirmed  confirm_asset_ready returned
+    hotkey_sent      trade hotkey sent (includes the hold until the entry instant)
+    placed           placed_at recorded
+    result           result callback matched the trade
+"""
+
+import atexit
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("received", "parsed", "scheduled", "fired", "asset_confirmed", "hotkey_sent", "placed", "result")
+
+# Bucket upper bounds in seconds: 0.1 ms .. ~10 min, 25% apart
+_BUCKETS = []
+_b = 0.0001
+while _b < 600:
+    _BUCKETS.append(_b)
+    _b *= 1.25
+_BUCKETS.append(float("inf"))
+
+
+def now():
+    return time.monotonic()
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        seconds = max(0.0, seconds)
+        self.counts[bisect.bisect_left(_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        target = p / 100.0 * self.count
+        running = 0
+        for i, c in enumerate(self.counts):
+            running += c
+            if running >= target:
+                return min(_BUCKETS[i], self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+            "p50_ms": _ms(self.percentile(50)),
+            "p95_ms": _ms(self.percentile(95)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}    # stage -> Histogram
+        self._assets = {}    # (stage, asset) -> Histogram
+
+    def stamp(self, stamps, stage, asset=None, at=None):
+        """Set stamps[stage] and record the time since the latest earlier stage present."""
+        at = now() if at is None else at
+        stamps[stage] = at
+        idx = STAGES.index(stage)
+        for prev in reversed(STAGES[:idx]):
+            if prev in stamps:
+                self.observe(stage, asset, at - stamps[prev])
+                break
+        return at
+
+    def observe(self, stage, asset, seconds):
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = Histogram()
+            hist.record(seconds)
+            if asset:
+                key = (stage, asset)
+                hist = self._assets.get(key)
+                if hist is None:
+                    hist = self._assets[key] = Histogram()
+                hist.record(seconds)
+
+    def summary(self):
+        with self._lock:
+            per_stage = {s: self._stages[s].summary() for s in STAGES if s in self._stages}
+            per_asset = {}
+            for (stage, asset), hist in self._assets.items():
+                per_asset.setdefault(asset, {})[stage] = hist.summary()
+        return {"stages": per_stage, "assets": per_asset}
+
+    def dump(self):
+        data = self.summary()
+        if not data["stages"]:
+            return
+        logger.info("[⏱️] Stage latency (p50 / p95 / p99 ms):")
+        for stage, s in data["stages"].items():
+            logger.info(f"[⏱️]   {stage:<16} n={s['count']:<5} {s['p50_ms']} / {s['p95_ms']} / {s['p99_ms']}")
+        for asset, stages in data["assets"].items():
+            parts = ", ".join(f"{st} {s['p50_ms']}/{s['p95_ms']}/{s['p99_ms']}" for st, s in stages.items())
+            logger.info(f"[⏱️]   {asset}: {parts}")
+
+
+# -----------------
+# Shared instance
+# -----------------
+latency = LatencyRecorder()
+atexit.register(latency.dump)
@@ -0,0 +1,114 @@
+"""
+lean_browser.py — strip rendering work from the trading tab.
+
+Optional (LEAN_BROWSER=1):
+
+- launch options: eager page-load strategy, images off, remote fonts off;
+- per tab (CDP): Network.setBlockedURLs for images, fonts and ad/analytics
+  hosts, plus a script injected before any page script that caps
+  requestAnimationFrame at LEAN_FPS and disables CSS animations/transitions.
+
+The chart still updates, just at a lower frame rate; the DOM the bot reads
+is unchanged. benchmark() flips the runtime parts off and on and reports
+Chrome's CPU and RSS for both (the /lean command).
+"""
+
+import logging
+import os
+import time
+
+from procinfo import process_tree_cpu_seconds, process_tree_rss_mb
+
+logger = logging.getLogger(__name__)
+
+LEAN_BROWSER = os.getenv("LEAN_BROWSER", "0") == "1"
+LEAN_FPS = int(os.getenv("LEAN_FPS", "10"))
+BENCHMARK_SECONDS = 10.0
+
+BLOCKED_URLS = [
+    # images and fonts
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # ads / analytics
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*mc.yandex.ru*",
+    "*clarity.ms*", "*intercom.io*",
+]
+
+# Runs before any page script in every document of the tab. window.__poLean.on toggles it.
+LEAN_SCRIPT = """
+(function () {
+    if (window.__poLean) { return; }
+    var lean = window.__poLean = {on: true, fps: %d, last: 0};
+    var raf = window.requestAnimationFrame.bind(window);
+    window.requestAnimationFrame = function (cb) {
+        if (!lean.on) { return raf(cb); }
+        return raf(function tick(ts) {
+            // callbacks of one frame share ts, so every consumer of an allowed frame runs
+            if (ts === lean.last || ts - lean.last >= 1000 / lean.fps) { lean.last = ts; cb(ts); }
+            else { raf(tick); }
+        });
+    };
+    var style = lean.style = document.createElement('style');
+    style.textContent = '*,*::before,*::after{animation-duration:0s!important;animation-delay:0s!important;' +
+                        'transition:none!important;scroll-behavior:auto!important}';
+    var add = function () { (document.head || document.documentElement).appendChild(style); };
+    if (document.documentElement) { add(); } else { document.addEventListener('DOMContentLoaded', add); }
+})();
+""" % LEAN_FPS
+
+TOGGLE_SCRIPT = """
+var lean = window.__poLean;
+if (!lean) { return false; }
+lean.on = arguments[0];
+lean.style.disabled = !arguments[0];
+return true;
+"""
+
+
+def lean_options(chrome_options):
+    """Launch-time part of lean mode for a ChromeOptions instance."""
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_argument("--disable-remote-fonts")
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return chrome_options
+
+
+def apply_lean(driver):
+    """Per-tab part of lean mode; call on every new tab before it navigates."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": LEAN_SCRIPT})
+        return True
+    except Exception as e:
+        logger.warning(f"[⚠️] Lean mode could not be applied to this tab: {e}")
+        return False
+
+
+def set_lean(driver, on):
+    """Runtime switch for the current tab (request blocking and frame cap)."""
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS if on else []})
+    return bool(driver.execute_script(TOGGLE_SCRIPT, on))
+
+
+def measure(pid, seconds=BENCHMARK_SECONDS):
+    """Chrome's CPU % (of one core) and RSS over a window."""
+    cpu0, t0 = process_tree_cpu_seconds(pid), time.monotonic()
+    time.sleep(seconds)
+    cpu1, t1 = process_tree_cpu_seconds(pid), time.monotonic()
+    return {"cpu_pct": round((cpu1 - cpu0) / (t1 - t0) * 100, 1), "rss_mb": process_tree_rss_mb(pid)}
+
+
+def benchmark(driver, seconds=BENCHMARK_SECONDS):
+    """Before/after figures: the window with lean parts off, then on again."""
+    pid = driver.service.process.pid
+    set_lean(driver, False)
+    try:
+        before = measure(pid, seconds)
+    finally:
+        set_lean(driver, True)
+    after = measure(pid, seconds)
+    logger.info(f"[🪶] Lean mode — before: {before['cpu_pct']}% CPU, {before['rss_mb']}MB RSS | "
+                f"after: {after['cpu_pct']}% CPU, {after['rss_mb']}MB RSS")
+    return {"before": before, "after": after}
@@ -0,0 +1,187 @@
+"""
+memory_watchdog.py — keep the long-lived Chrome session from growing until OOM.
+
+Every WATCHDOG_INTERVAL the watchdog samples:
+
+- RSS of chromedriver + Chrome (procinfo.py, /proc);
+- JS heap of the trading tab (CDP Runtime.getHeapUsage).
+
+Crossing a reload threshold schedules a tab reload; crossing the recycle
+threshold (or staying above the reload threshold after a reload) schedules a
+full browser recycle. A pending action only runs inside an idle gap: no trade
+open and no scheduler entry for the next RECYCLE_GAP_MINUTES. It first shrinks
+the tab pool (tab_pool.py) and samples again; the action only runs if that was
+not enough. After the action the session and the cached asset/timeframe are
+restored. With a standby
+browser (failover.py) the recycle is a switch to the standby.
+
+MEMORY_WATCHDOG=0 disables it.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from driver_owner import set_thread_priority, command_priority, PRIORITY_MONITOR, PRIORITY_PREARM
+from procinfo import process_tree_rss_mb
+from profile_store import ProfileStore
+
+logger = logging.getLogger(__name__)
+
+MEMORY_WATCHDOG = os.getenv("MEMORY_WATCHDOG", "1") == "1"
+WATCHDOG_INTERVAL = 30                                              # seconds between samples
+RSS_RELOAD_MB = float(os.getenv("RSS_RELOAD_MB", "1500"))
+RSS_RECYCLE_MB = float(os.getenv("RSS_RECYCLE_MB", "2500"))
+HEAP_RELOAD_MB = float(os.getenv("HEAP_RELOAD_MB", "400"))
+RECYCLE_GAP_MINUTES = float(os.getenv("RECYCLE_GAP_MINUTES", "3"))
+
+RELOAD, RECYCLE = "reload", "recycle"
+
+
+class MemoryWatchdog:
+    def __init__(self, selenium, trades, next_fire_in):
+        self.selenium = selenium
+        self.trades = trades
+        self._next_fire_in = next_fire_in
+        self.pending = None
+        self.last = {}
+        self.reloads = 0
+        self.pool_shrinks = 0
+        self.recycles = 0
+        self._reloaded_since_recycle = False
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        threading.Thread(target=self._run, name="memory-watchdog", daemon=True).start()
+        logger.info(f"[🧠] Memory watchdog started (reload at {RSS_RELOAD_MB:.0f}MB RSS / "
+                    f"{HEAP_RELOAD_MB:.0f}MB heap, recycle at {RSS_RECYCLE_MB:.0f}MB RSS).")
+
+    def stop(self):
+        self._running = False
+
+    # -----------------
+    # Sampling
+    # -----------------
+    def sample(self):
+        driver = self.selenium.driver
+        try:
+            rss = process_tree_rss_mb(driver.service.process.pid)
+        except Exception:
+            rss = 0.0
+        heap = None
+        try:
+            usage = driver.execute_cdp_cmd("Runtime.getHeapUsage", {})
+            heap = round(usage.get("usedSize", 0) / (1024 * 1024), 1)
+        except Exception as e:
+            logger.debug(f"[⚠️] JS heap sample failed: {e}")
+        self.last = {"rss_mb": rss, "heap_mb": heap, "at": time.time()}
+        return self.last
+
+    def _assess(self, s):
+        if s["rss_mb"] >= RSS_RECYCLE_MB:
+            return RECYCLE
+        over = s["rss_mb"] >= RSS_RELOAD_MB or (s["heap_mb"] or 0) >= HEAP_RELOAD_MB
+        if not over:
+            self._reloaded_since_recycle = False
+            return None
+        # a reload that did not bring it down means the leak is outside the page
+        return RECYCLE if self._reloaded_since_recycle else RELOAD
+
+    def idle_gap(self):
+        if self.trades.open_assets():
+            return False
+        slack = self._next_fire_in()
+        return slack is None or slack >= RECYCLE_GAP_MINUTES * 60
+
+    # -----------------
+    # Loop
+    # -----------------
+    def _run(self):
+        set_thread_priority(PRIORITY_MONITOR)
+        while self._running:
+            s = self.sample()
+            action = self._assess(s)
+            if action and action != self.pending and self.pending != RECYCLE:
+                self.pending = action
+                logger.warning(f"[🧠] Chrome at {s['rss_mb']}MB RSS, heap {s['heap_mb']}MB — "
+                               f"{action} scheduled for the next {RECYCLE_GAP_MINUTES:g}-minute idle gap.")
+            if self.pending and self.idle_gap():
+                action, self.pending = self.pending, None
+                try:
+                    with command_priority(PRIORITY_PREARM):
+                        if self.shrink_pool():
+                            action = self._assess(self.sample())  # the pooled tabs may have been the excess
+                        if action == RELOAD:
+                            self.reload()
+                        elif action == RECYCLE:
+                            self.recycle()
+                except Exception as e:
+                    logger.error(f"[❌] Browser {action} failed: {e}; retrying in the next idle gap.")
+                    self.pending = self.pending or action
+            time.sleep(WATCHDOG_INTERVAL)
+
+    # -----------------
+    # Actions
+    # -----------------
+    def shrink_pool(self):
+        closed = self.selenium.tab_pool.shrink()
+        if closed:
+            self.pool_shrinks += 1
+            logger.info(f"[🗂️] Closed {closed} pooled tabs under memory pressure "
+                        f"(pool now {self.selenium.tab_pool.size}).")
+        return closed
+
+    def reload(self):
+        sel = self.selenium
+        started = time.monotonic()
+        asset, timeframe = sel.ui_state.asset, sel.ui_state.timeframe
+        with sel.tab_pool.lock:
+            sel.tab_pool.ensure_home()
+            sel.driver.refresh()
+            sel.ui_state.invalidate()
+            sel.result_feed.installed = False
+            if not sel.profile.is_authenticated(sel.driver):
+                sel.profile.restore_session(sel.driver)
+            sel.restore_ui_state(asset, timeframe)
+        self.reloads += 1
+        self._reloaded_since_recycle = True
+        logger.info(f"[🔄] Trading tab reloaded in {time.monotonic() - started:.1f}s.")
+
+    def recycle(self):
+        sel = self.selenium
+        if sel.failover and sel.failover.standby_ready():
+            if sel.failover.failover(reason="memory recycle"):
+                self._done_recycle()
+                return
+        started = time.monotonic()
+        asset, timeframe = sel.ui_state.asset, sel.ui_state.timeframe
+        with sel.tab_pool.lock:
+            old_driver, old_profile = sel.driver, sel.profile
+            sel.driver_owner.shutdown("memory recycle")
+            try:
+                old_driver.quit()
+            except Exception as e:
+                logger.debug(f"[⚠️] Quitting the old browser raised: {e}")
+            old_profile.release()
+            profile = ProfileStore()
+            driver = sel.setup_driver(sel.headless, profile=profile)
+            sel.install_driver(driver, profile, asset, timeframe)
+        self._done_recycle()
+        logger.info(f"[♻️] Browser recycled in {time.monotonic() - started:.1f}s.")
+
+    def _done_recycle(self):
+        self.recycles += 1
+        self._reloaded_since_recycle = False
+
+    def stats(self):
+        return {
+            "last": self.last,
+            "pending": self.pending,
+            "pool_shrinks": self.pool_shrinks,
+            "reloads": self.reloads,
+            "recycles": self.recycles,
+        }
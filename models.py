@@ -0,0 +1,90 @@
+"""
+models.py — compact record types shared by core and selenium.
+
+- Signal: immutable parsed signal; converted copies are made with with_times().
+- Trade: one placed (or about to be placed) trade at a martingale level.
+- TradeResult: outcome of a trade.
+- TIMEFRAME_SECONDS: expiry length per timeframe label.
+- normalize_asset: the one asset key used by the UI cache, tab pool, result
+  bus and WebSocket listener.
+
+`stamps` maps pipeline stage -> time.monotonic() (see latency.py).
+"""
+
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional, Tuple, Union
+
+
+TIMEFRAME_SECONDS = {
+    "S5": 5, "S15": 15, "S30": 30,
+    "M1": 60, "M3": 180, "M5": 300, "M15": 900, "M30": 1800,
+    "H1": 3600,
+}
+
+
+def normalize_asset(name):
+    """'EUR/USD OTC', 'EURUSD-OTC', 'eurusd_otc' -> 'EURUSDOTC' (OTC stays a different asset)."""
+    return (name or "").upper().replace("/", "").replace(" ", "").replace("_", "").replace("-", "")
+
+
+class TradeResult(str, Enum):
+    WIN = "WIN"
+    LOSS = "LOSS"
+    SKIPPED_AFTER_WIN = "SKIPPED_AFTER_WIN"
+    ABORTED_MAX_MARTINGALE = "ABORTED_MAX_MARTINGALE"
+    EXPIRED = "EXPIRED"
+
+
+@dataclass(frozen=True, slots=True)
+class Signal:
+    currency_pair: str
+    direction: str = "BUY"
+    entry_time: Union[str, datetime, None] = None
+    timeframe: str = "M1"
+    martingale_times: Tuple[Union[str, datetime], ...] = ()
+    source: str = "UTC-3"
+    stamps: Dict[str, float] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Signal":
+        return cls(
+            currency_pair=data["currency_pair"],
+            direction=(data.get("direction") or "BUY").upper(),
+            entry_time=data.get("entry_time"),
+            timeframe=data.get("timeframe") or "M1",
+            martingale_times=tuple(data.get("martingale_times") or ()),
+            source=data.get("source") or "UTC-3",
+            stamps=dict(data.get("stamps") or {}),
+        )
+
+    def with_times(self, entry_time, martingale_times) -> "Signal":
+        """Copy of this signal with resolved entry/martingale datetimes."""
+        return replace(self, entry_time=entry_time, martingale_times=tuple(martingale_times))
+
+    def chain_id(self) -> str:
+        """Identifies this signal's martingale chain (asset + base entry time); the scheduler tag."""
+        return f"{self.currency_pair}@{self.entry_time}"
+
+
+@dataclass(slots=True, eq=False)
+class Trade:
+    id: str
+    currency_pair: str
+    entry_dt: datetime
+    level: int
+    timeframe: str = "M1"
+    chain: Optional[str] = None              # Signal.chain_id() of the signal it belongs to
+    placed_at: Optional[datetime] = None
+    resolved: bool = False
+    result: Optional[TradeResult] = None
+    increase_count: int = 0
+    fire_offset_ms: Optional[float] = None   # trade key sent minus the entry instant
+    stamps: Dict[str, float] = field(default_factory=dict, repr=False)
+
+    def closes_at(self) -> Optional[float]:
+        """Epoch seconds at which the placed trade expires (None until placed)."""
+        if self.placed_at is None:
+            return None
+        return self.placed_at.timestamp() + TIMEFRAME_SECONDS.get(self.timeframe.upper(), 60)
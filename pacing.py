@@ -0,0 +1,89 @@
+"""
+pacing.py — latency budgets for UI operations.
+
+LATENCY_BUDGET=1 (default): every UI operation (select_asset, set_timeframe)
+runs against a deadline, fixed sleeps are replaced by event waits, and
+humanizing pauses/clicks are only inserted when the next scheduled entry is
+far enough away to absorb them. LATENCY_BUDGET=0 restores the relaxed
+behaviour: humanizing always runs.
+
+    pacer = Pacer(scheduler.next_fire_in)
+    deadline = pacer.deadline("select_asset", prearm_deadline)
+    ... wait_until(driver, condition, deadline) ...
+    pacer.humanize(0.5, 2.0, deadline)
+"""
+
+import logging
+import os
+import random
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUDGET = os.getenv("LATENCY_BUDGET", "1") == "1"
+HUMANIZE_MIN_SLACK = 30.0  # seconds that must remain before the next entry after a pause
+EVENT_POLL = 0.05          # seconds between event-wait checks
+
+# Per-operation budget in seconds
+OP_BUDGETS = {
+    "select_asset": 6.0,
+    "set_timeframe": 3.0,
+}
+
+
+class Pacer:
+    def __init__(self, next_fire_in=None, enabled=LATENCY_BUDGET):
+        self._next_fire_in = next_fire_in or (lambda: None)
+        self.enabled = enabled
+        self.humanized = 0
+        self.skipped = 0
+
+    def deadline(self, op, deadline=None):
+        """Monotonic deadline for one UI operation; a caller's earlier deadline wins."""
+        own = time.monotonic() + OP_BUDGETS.get(op, 5.0)
+        return own if deadline is None else min(own, deadline)
+
+    def slack(self):
+        """Seconds until the next scheduled entry (None if nothing is queued)."""
+        try:
+            return self._next_fire_in()
+        except Exception:
+            return None
+
+    def humanize(self, a, b, deadline=None, action=None):
+        """Random pause in [a, b] (then optional action) only if it cannot delay an entry."""
+        pause = random.uniform(a, b)
+        if self.enabled:
+            slack = self.slack()
+            if slack is not None and slack - pause < HUMANIZE_MIN_SLACK:
+                self.skipped += 1
+                return False
+            if deadline is not None and time.monotonic() + pause > deadline:
+                self.skipped += 1
+                return False
+        logger.debug(f"[⌛] Humanizing pause {pause:.1f}s.")
+        time.sleep(pause)
+        if action:
+            try:
+                action()
+            except Exception:
+                pass
+        self.humanized += 1
+        return True
+
+    def stats(self):
+        return {"enabled": self.enabled, "humanized": self.humanized, "skipped": self.skipped}
+
+
+def remaining(deadline):
+    return max(0.0, deadline - time.monotonic())
+
+
+def wait_until(driver, condition, deadline):
+    """WebDriverWait until the deadline with a tight poll; returns the truthy result or None."""
+    try:
+        return WebDriverWait(driver, remaining(deadline), poll_frequency=EVENT_POLL).until(condition)
+    except Exception:
+        return None
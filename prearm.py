@@ -0,0 +1,152 @@
+"""
+prearm.py — staged UI preparation ahead of each trade entry.
+
+Driven by its own TradeScheduler (so stages never hold the workers that fire
+trades), each entry gets a chain of stages:
+    T-30s  switch_asset   select the asset (skipped if already shown)
+    T-20s  set_timeframe  pick the expiry
+    T-5s   verify         confirm asset is on screen; re-select if there is time
+    T-1s   fire           TradeManager.execute_trade re-confirms the asset (cached UI
+                          state) and hands the trade key to the actuator for T-0
+
+Stages run in order. A stage whose time has already passed (late signal) runs
+immediately after the previous one. Each stage has its own deadline; when a
+stage fails or overruns, its fallback runs (retry if time allows, otherwise
+leave it to the next stage / the live check at T-0).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# name, lead seconds before entry, budget seconds
+PREARM_STAGES = (
+    ("switch_asset", 30, 10),
+    ("set_timeframe", 20, 10),
+    ("verify", 5, 4),
+)
+RETRY_MIN_SECONDS = 2.0     # only retry a failed switch if at least this much time is left
+ARMED_MAX_AGE = 10.0        # a verify older than this is not trusted at T-0
+PREARM_WORKERS = 2          # stages serialize on the tab pool lock anyway
+
+
+class ArmState:
+    __slots__ = ("asset", "timeframe", "entry_dt", "chain", "stage", "ready", "verified_mono", "failures")
+
+    def __init__(self, asset, timeframe, entry_dt, chain=None):
+        self.asset = asset
+        self.timeframe = timeframe
+        self.entry_dt = entry_dt
+        self.chain = chain
+        self.stage = None
+        self.ready = False
+        self.verified_mono = None
+        self.failures = []
+
+
+class PrearmPipeline:
+    def __init__(self, scheduler, selenium):
+        self.scheduler = scheduler
+        self.selenium = selenium
+        self._states = {}
+        self._lock = threading.Lock()
+
+    # -----------------
+    # Public API
+    # -----------------
+    def arm(self, signal, entry_dt):
+        state = ArmState(signal.currency_pair, signal.timeframe, entry_dt, signal.chain_id())
+        with self._lock:
+            self._prune()
+            self._states[(state.asset, entry_dt)] = state
+        self._schedule_stage(state, 0)
+        return state
+
+    def is_armed(self, asset, entry_dt):
+        """True if the verify stage passed recently (the asset is still re-confirmed at T-0)."""
+        with self._lock:
+            state = self._states.pop((asset, entry_dt), None)
+        if state is None or not state.ready or state.verified_mono is None:
+            return False
+        return (time.monotonic() - state.verified_mono) <= ARMED_MAX_AGE
+
+    def cancel(self, chain):
+        """Drop the queued stages of one signal's chain. Returns the number cancelled."""
+        return self.scheduler.cancel_tag(chain)
+
+    # -----------------
+    # Stage chaining
+    # -----------------
+    def _schedule_stage(self, state, idx):
+        if idx >= len(PREARM_STAGES):
+            return
+        name, lead, _ = PREARM_STAGES[idx]
+        when = state.entry_dt - timedelta(seconds=lead)
+        self.scheduler.schedule(
+            when, self._run_stage, state, idx,
+            priority=-1,
+            label=f"prearm:{name} {state.asset}@{state.entry_dt.strftime('%H:%M')}",
+            tag=state.chain,
+        )
+
+    def _run_stage(self, state, idx):
+        name, _, budget = PREARM_STAGES[idx]
+        entry_in = (state.entry_dt - datetime.now(state.entry_dt.tzinfo)).total_seconds()
+        if entry_in <= 0:
+            return
+        deadline = time.monotonic() + min(budget, entry_in - 0.5)
+        state.stage = name
+        try:
+            ok = getattr(self, f"_stage_{name}")(state, deadline)
+        except Exception as e:
+            logger.warning(f"[⚠️] Pre-arm {name} for {state.asset} raised: {e}")
+            ok = False
+        if not ok:
+            state.failures.append(name)
+        if time.monotonic() > deadline:
+            logger.warning(f"[⏱️] Pre-arm {name} for {state.asset} overran its deadline.")
+        self._schedule_stage(state, idx + 1)
+
+    # -----------------
+    # Stages (each returns True on success)
+    # -----------------
+    def _stage_switch_asset(self, state, deadline):
+        if self.selenium.detect_asset(state.asset):
+            return True
+        if self.selenium.select_asset(state.asset, deadline=deadline):
+            return True
+        # Fallback: one retry if there is room before the deadline
+        if deadline - time.monotonic() >= RETRY_MIN_SECONDS:
+            return self.selenium.select_asset(state.asset, deadline=deadline)
+        return False
+
+    def _stage_set_timeframe(self, state, deadline):
+        if self.selenium.set_timeframe(state.timeframe, deadline=deadline):
+            return True
+        # Fallback: the trade can still fire on the current expiry; verify logs it
+        logger.warning(f"[⚠️] Pre-arm could not set timeframe {state.timeframe} for {state.asset}.")
+        return False
+
+    def _stage_verify(self, state, deadline):
+        ui = self.selenium.verify_ui_state(state.asset, state.timeframe)
+        if not ui['asset'] and deadline - time.monotonic() >= RETRY_MIN_SECONDS:
+            # Fallback: another signal may have switched the chart; switch back
+            logger.info(f"[🔁] Pre-arm verify: {state.asset} not on screen, re-selecting.")
+            self.selenium.select_asset(state.asset, deadline=deadline)
+            ui = self.selenium.verify_ui_state(state.asset, state.timeframe)
+        if not ui['timeframe']:
+            logger.warning(f"[⚠️] Pre-arm verify: timeframe {state.timeframe} not confirmed for {state.asset}.")
+        state.ready = ui['asset']
+        state.verified_mono = time.monotonic()
+        if state.ready:
+            logger.info(f"[🛡️] Pre-armed {state.asset} for {state.entry_dt.strftime('%H:%M')} — only the trade key is left.")
+        return state.ready
+
+    def _prune(self):
+        now_ts = time.time()
+        stale = [k for k, st in self._states.items() if now_ts - st.entry_dt.timestamp() > 60]
+        for k in stale:
+            del self._states[k]
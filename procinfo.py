@@ -0,0 +1,74 @@
+"""
+procinfo.py — resident memory and CPU time of a process tree, read from /proc (Linux only).
+
+Used to measure chromedriver + Chrome (every renderer is a child process).
+RSS is summed per process, so pages shared between Chrome processes are
+counted more than once; treat the figure as an upper bound for caps.
+"""
+
+import os
+from collections import defaultdict
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024) if hasattr(os, "sysconf") else 4096 / (1024 * 1024)
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _children():
+    children = defaultdict(list)
+    try:
+        pids = [p for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return children
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # the command name may contain spaces; fields after ')' are fixed
+        fields = stat.rsplit(")", 1)[-1].split()
+        if len(fields) > 1:
+            children[int(fields[1])].append(int(pid))
+    return children
+
+
+def process_tree(pid):
+    """pid plus all of its descendants."""
+    children = _children()
+    tree, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        tree.append(p)
+        stack.extend(children.get(p, ()))
+    return tree
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of one process."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[-1].split()
+        return (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def process_tree_cpu_seconds(pid):
+    if not pid:
+        return 0.0
+    return sum(cpu_seconds(p) for p in process_tree(pid))
+
+
+def process_tree_rss_mb(pid):
+    """Summed RSS in MB of pid and its descendants (0.0 if pid is unknown)."""
+    if not pid:
+        return 0.0
+    return round(sum(rss_mb(p) for p in process_tree(pid)), 1)
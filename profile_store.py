@@ -0,0 +1,190 @@
+"""
+profile_store.py — persistent Chrome profile and session reuse.
+
+- acquire() returns a persistent --user-data-dir guarded by an flock, so a
+  restarted bot reuses the warm profile (cache, local storage, cookies).
+  If another live process holds the lock, or a Chrome from an earlier run is
+  still alive on the profile (detached browsers outlive the bot), a throwaway
+  /tmp/chrome-user-data-<uuid> dir is used instead (the old behaviour).
+  Chrome's Singleton* files left behind by a crash are cleared once we own the
+  lock and their pid is dead.
+- restore_session() opens the dashboard and reports whether it is already
+  authenticated; if not, it re-injects the cookies saved by save_cookies()
+  and checks again. Only when both fail does the caller run the login form.
+- gc() removes stale /tmp/chrome-user-data-* dirs from earlier runs.
+"""
+
+import fcntl
+import glob
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("CHROME_PROFILE_DIR", os.path.join(os.path.expanduser("~"), ".po-chrome-profile"))
+COOKIES_PATH = os.getenv("COOKIES_PATH", os.path.join(os.path.expanduser("~"), ".po-cookies.json"))
+TMP_PROFILE_GLOB = "/tmp/chrome-user-data-*"
+TMP_PROFILE_MAX_AGE = 6 * 3600      # seconds before a throwaway profile dir is collected
+COOKIE_SAVE_INTERVAL = 600          # seconds between periodic cookie snapshots
+DASHBOARD_URL = "https://pocketoption.com/en/cabinet/"
+DASHBOARD_MARKERS = ".asset-name-selector, .timeframe-selector"
+AUTH_CHECK_TIMEOUT = 8
+
+
+def _in_use(path):
+    """Chrome's SingletonLock is a symlink to '<host>-<pid>'; a live pid means the dir is in use."""
+    try:
+        target = os.readlink(os.path.join(path, "SingletonLock"))
+        os.kill(int(target.rsplit("-", 1)[-1]), 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+class ProfileStore:
+    def __init__(self, profile_dir=PROFILE_DIR, cookies_path=COOKIES_PATH):
+        self.profile_dir = profile_dir
+        self.cookies_path = cookies_path
+        self.user_data_dir = None
+        self.persistent = False
+        self.authenticated = False  # periodic cookie snapshots only for a logged-in session
+        self._lock_fd = None
+        self._last_cookie_save = 0.0
+
+    # -----------------
+    # Profile directory
+    # -----------------
+    def acquire(self):
+        """Returns the --user-data-dir to use; the persistent one if we can lock it."""
+        self.gc()
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            fd = os.open(os.path.join(self.profile_dir, ".bot.lock"), os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                raise
+            if _in_use(self.profile_dir):
+                os.close(fd)
+                raise OSError("a live Chrome still holds its SingletonLock")
+            self._lock_fd = fd
+            # we own the profile and its Chrome is gone, so singleton files are left over from a crash
+            for name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+                path = os.path.join(self.profile_dir, name)
+                if os.path.lexists(path):
+                    os.unlink(path)
+            self.user_data_dir, self.persistent = self.profile_dir, True
+            logger.info(f"[🗄️] Using persistent Chrome profile {self.profile_dir}.")
+        except OSError as e:
+            self.user_data_dir = f"/tmp/chrome-user-data-{uuid.uuid4()}"
+            self.persistent = False
+            logger.warning(f"[⚠️] Persistent profile unavailable ({e}); using {self.user_data_dir}.")
+        return self.user_data_dir
+
+    def release(self):
+        """Give up the persistent profile lock (its Chrome has been quit)."""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def gc(self, max_age=TMP_PROFILE_MAX_AGE):
+        """Deletes throwaway profile dirs older than max_age. Returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - max_age
+        for path in glob.glob(TMP_PROFILE_GLOB):
+            try:
+                if path == self.user_data_dir or os.path.getmtime(path) > cutoff or _in_use(path):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info(f"[🧹] Removed {removed} stale Chrome profile dirs from /tmp.")
+        return removed
+
+    # -----------------
+    # Session
+    # -----------------
+    def restore_session(self, driver):
+        """True if the dashboard is reachable without the login form."""
+        driver.get(DASHBOARD_URL)
+        if self.is_authenticated(driver):
+            logger.info("[🔓] Profile session still valid — skipping login.")
+            self.authenticated = True
+            return True
+        cookies = self._load_cookies()
+        if not cookies:
+            return False
+        restored = 0
+        for cookie in cookies:
+            cookie = {k: v for k, v in cookie.items() if k in ("name", "value", "domain", "path", "secure", "httpOnly", "expiry")}
+            if "expiry" in cookie:
+                cookie["expiry"] = int(cookie["expiry"])
+            try:
+                driver.add_cookie(cookie)
+                restored += 1
+            except Exception:
+                continue
+        driver.get(DASHBOARD_URL)
+        if self.is_authenticated(driver):
+            logger.info(f"[🔓] Session restored from {restored} saved cookies — skipping login.")
+            self.authenticated = True
+            return True
+        return False
+
+    @staticmethod
+    def is_authenticated(driver, timeout=AUTH_CHECK_TIMEOUT):
+        def state(d):
+            if d.find_elements(By.NAME, "email"):
+                return "login"
+            if "/cabinet" in d.current_url and d.find_elements(By.CSS_SELECTOR, DASHBOARD_MARKERS):
+                return "dashboard"
+            return False
+
+        try:
+            return WebDriverWait(driver, timeout, poll_frequency=0.2).until(state) == "dashboard"
+        except Exception:
+            return False
+
+    def save_cookies(self, driver):
+        """Snapshot the session cookies; call only while the dashboard is authenticated."""
+        try:
+            cookies = driver.get_cookies()
+        except Exception as e:
+            logger.debug(f"[⚠️] Could not read cookies: {e}")
+            return False
+        if not cookies:
+            return False
+        tmp = f"{self.cookies_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(cookies, f)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.cookies_path)
+        except OSError as e:
+            logger.debug(f"[⚠️] Could not persist cookies: {e}")
+            return False
+        self._last_cookie_save = time.monotonic()
+        self.authenticated = True
+        return True
+
+    def maybe_save_cookies(self, driver, interval=COOKIE_SAVE_INTERVAL):
+        if self.authenticated and time.monotonic() - self._last_cookie_save >= interval:
+            return self.save_cookies(driver)
+        return False
+
+    def _load_cookies(self):
+        try:
+            with open(self.cookies_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return []
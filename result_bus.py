@@ -0,0 +1,200 @@
+"""
+result_bus.py — one path from detected results to the trade they belong to.
+
+Detectors (the WebSocket listener, or the DOM result feed while the socket is
+not flowing) publish ResultEvents with a stable id. Each placed trade
+subscribes with its asset and expiry time. publish():
+
+- drops an event whose id was already seen (same row seen twice, tab switch, ...);
+- matches it to the subscription for that asset whose expiry has been reached,
+  oldest first (events without an asset go to the oldest due subscription);
+- removes the subscription and delivers exactly once via deliver(trade_id, asset, result).
+
+Events that match no due subscription are counted and dropped rather than
+guessed onto another trade. Nothing polls per trade.
+
+ExpiryPollSchedule tells the single DOM poller how long to sleep: idle while
+nothing is open, fast inside the merged windows around the open trades'
+expiries, and just often enough to reach the next window otherwise. Every
+poll is counted against each open subscription; the count for each resolved
+trade is kept in poll_counts.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+from models import normalize_asset
+
+logger = logging.getLogger(__name__)
+
+CLOSE_TOLERANCE = 5.0          # seconds a result may arrive before the computed expiry (clock skew)
+SUBSCRIPTION_MAX_AGE = 300     # seconds past expiry before an unanswered subscription is dropped
+SEEN_MAX = 1000                # event ids remembered for deduplication
+
+IDLE_POLL_INTERVAL = 10.0      # seconds between polls with no trade open
+WAIT_POLL_INTERVAL = 2.0       # longest sleep while trades are open but no expiry is near
+HOT_POLL_INTERVAL = 0.1        # inside an expiry window
+LATE_POLL_INTERVAL = 0.5       # a trade is past its window and still unresolved
+WINDOW_BEFORE = 2.0            # seconds before expiry a window opens
+WINDOW_AFTER = 15.0            # seconds after expiry it stays hot
+
+
+@dataclass(frozen=True, slots=True)
+class BusResult:
+    id: str
+    asset: Optional[str]
+    result: str        # "WIN" / "LOSS"
+    ts: float          # epoch seconds the detector saw it
+    source: str        # "ws" / "dom"
+
+
+class Subscription:
+    __slots__ = ("trade_id", "asset", "closes_at", "polls")
+
+    def __init__(self, trade_id, asset, closes_at):
+        self.trade_id = trade_id
+        self.asset = asset
+        self.closes_at = closes_at
+        self.polls = 0
+
+
+class ResultBus:
+    def __init__(self, deliver):
+        self._deliver = deliver
+        self._subs = {}              # asset -> [Subscription] in expiry order
+        self._seen = OrderedDict()   # event id -> None (bounded)
+        self._lock = threading.Lock()
+        self.delivered = 0
+        self.duplicates = 0
+        self.unmatched = 0
+        self.poll_counts = deque(maxlen=200)   # (trade_id, polls until its result) per resolved trade
+
+    # -----------------
+    # Subscriptions
+    # -----------------
+    def subscribe(self, trade):
+        sub = Subscription(trade.id, normalize_asset(trade.currency_pair), trade.closes_at())
+        with self._lock:
+            subs = self._subs.setdefault(sub.asset, [])
+            subs.append(sub)
+            subs.sort(key=lambda s: s.closes_at)
+        return sub
+
+    def unsubscribe(self, trade_id):
+        """Withdraw a trade that was resolved some other way; its stale subscription would take the next result."""
+        with self._lock:
+            for subs in self._subs.values():
+                for sub in subs:
+                    if sub.trade_id == trade_id:
+                        subs.remove(sub)
+                        return True
+        return False
+
+    def expiries(self):
+        with self._lock:
+            return [s.closes_at for subs in self._subs.values() for s in subs]
+
+    def note_poll(self):
+        """One detector poll happened; charge it to every trade still waiting."""
+        with self._lock:
+            for subs in self._subs.values():
+                for sub in subs:
+                    sub.polls += 1
+
+    def prune(self, now_ts=None):
+        """Drop subscriptions long past expiry (their result was never seen). Returns the count."""
+        cutoff = (now_ts or time.time()) - SUBSCRIPTION_MAX_AGE
+        dropped = 0
+        with self._lock:
+            for asset, subs in self._subs.items():
+                keep = [s for s in subs if s.closes_at >= cutoff]
+                dropped += len(subs) - len(keep)
+                self._subs[asset] = keep
+        if dropped:
+            logger.warning(f"[⌛] Dropped {dropped} result subscriptions that never got a result.")
+        return dropped
+
+    # -----------------
+    # Events
+    # -----------------
+    def publish(self, event):
+        """Returns True if the event was delivered to a trade."""
+        with self._lock:
+            if event.id in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen[event.id] = None
+            if len(self._seen) > SEEN_MAX:
+                self._seen.popitem(last=False)
+            sub = self._take_due(normalize_asset(event.asset) if event.asset else None, event.ts)
+            if sub is None:
+                self.unmatched += 1
+            else:
+                self.delivered += 1
+                self.poll_counts.append((sub.trade_id, sub.polls))
+        if sub is None:
+            logger.debug(f"[ℹ️] {event.source} result {event.asset} {event.result} matched no due trade.")
+            return False
+        logger.debug(f"[📬] {sub.trade_id} resolved by {event.source} after {sub.polls} polls.")
+        self._deliver(sub.trade_id, sub.asset, event.result)
+        return True
+
+    def _take_due(self, asset, ts):
+        pools = [self._subs.get(asset, [])] if asset else list(self._subs.values())
+        best, best_pool = None, None
+        for subs in pools:
+            # expiry order: only the head of each asset's list can be the oldest due one
+            if subs and subs[0].closes_at - CLOSE_TOLERANCE <= ts:
+                if best is None or subs[0].closes_at < best.closes_at:
+                    best, best_pool = subs[0], subs
+        if best is not None:
+            best_pool.remove(best)
+        return best
+
+    def stats(self):
+        with self._lock:
+            polls = [n for _, n in self.poll_counts]
+            return {
+                "waiting": sum(len(s) for s in self._subs.values()),
+                "delivered": self.delivered,
+                "duplicates": self.duplicates,
+                "unmatched": self.unmatched,
+                "polls_per_trade": {
+                    "mean": round(sum(polls) / len(polls), 1) if polls else None,
+                    "max": max(polls) if polls else None,
+                },
+            }
+
+
+def merge_windows(expiries, before=WINDOW_BEFORE, after=WINDOW_AFTER):
+    """[(start, end)] around each expiry, overlapping windows merged, in time order."""
+    merged = []
+    for closes_at in sorted(expiries):
+        start, end = closes_at - before, closes_at + after
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class ExpiryPollSchedule:
+    def __init__(self, bus):
+        self.bus = bus
+
+    def interval(self, now_ts=None):
+        """Seconds until the next DOM poll."""
+        now_ts = now_ts or time.time()
+        windows = merge_windows(self.bus.expiries())
+        if not windows:
+            return IDLE_POLL_INTERVAL
+        for start, end in windows:
+            if start <= now_ts <= end:
+                return HOT_POLL_INTERVAL
+            if start > now_ts:
+                return max(HOT_POLL_INTERVAL, min(WAIT_POLL_INTERVAL, start - now_ts))
+        return LATE_POLL_INTERVAL  # every window is behind us: results are overdue
@@ -0,0 +1,175 @@
+"""
+result_feed.py — push-based trade result detection from the trade-history DOM.
+
+A MutationObserver is injected once on the trade-history container. Every new
+result row is pushed into an in-page queue (window.__poResultQueue). A single
+consumer drains that queue with ONE execute_script per tick, which also
+re-installs the observer if the SPA re-rendered the container.
+
+WebDriver round-trips per tick are constant, however many trades are open.
+
+extract_trade_history() is the pull-side counterpart: every history row's
+asset, result, amount and time as JSON from a single execute_script, with an
+incremental cursor so repeated calls only return rows not seen before.
+"""
+
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+HISTORY_CONTAINERS = ".trade-history, .history-list"
+ROW_SELECTOR = ".trade-row, .trade-item, .history-item, .trade-result, .item"
+
+# Installs (or re-installs) the observer if needed, then drains the queue.
+DRAIN_SCRIPT = """
+var containers = arguments[0], rowSel = arguments[1];
+var feed = window.__poFeed;
+if (!feed || !feed.container || !document.contains(feed.container)) {
+    var container = document.querySelector(containers);
+    if (feed && feed.observer) { feed.observer.disconnect(); }
+    window.__poResultQueue = window.__poResultQueue || [];
+    feed = window.__poFeed = {container: container, observer: null, seq: (feed && feed.seq) || 0};
+    if (container) {
+        var text = function (root, sel) {
+            var el = root.querySelector(sel);
+            return el ? el.textContent.trim() : null;
+        };
+        var push = function (node) {
+            if (node.nodeType !== 1) { return; }
+            var row = node.matches(rowSel) ? node : node.querySelector(rowSel);
+            if (!row) { return; }
+            var res = row.matches('.trade-result') ? row.textContent.trim() : text(row, '.trade-result');
+            window.__poResultQueue.push({
+                seq: ++feed.seq,
+                asset: text(row, '.asset-name'),
+                result_text: res || row.textContent.trim(),
+                time_text: text(row, '.trade-time, .time'),
+                ts: Date.now()
+            });
+        };
+        feed.observer = new MutationObserver(function (mutations) {
+            for (var i = 0; i < mutations.length; i++) {
+                var added = mutations[i].addedNodes;
+                for (var j = 0; j < added.length; j++) { push(added[j]); }
+            }
+        });
+        feed.observer.observe(container, {childList: true, subtree: true});
+    }
+}
+var items = window.__poResultQueue || [];
+window.__poResultQueue = [];
+return {installed: !!feed.container, items: items};
+"""
+
+
+# Tags each row once with a monotonic data-po-seq; returns rows newer than the cursor.
+EXTRACT_SCRIPT = """
+var rowSel = arguments[0], cursor = arguments[1] || 0;
+var rows = document.querySelectorAll(rowSel);
+if (!rows.length) { rows = document.querySelectorAll(arguments[2]); }
+window.__poRowSeq = window.__poRowSeq || 0;
+var text = function (root, sel) {
+    var el = root.querySelector(sel);
+    return el ? el.textContent.trim() : null;
+};
+var fresh = [];
+for (var i = rows.length - 1; i >= 0; i--) {
+    if (!rows[i].dataset.poSeq) { fresh.push(rows[i]); }
+}
+for (var k = 0; k < fresh.length; k++) { fresh[k].dataset.poSeq = ++window.__poRowSeq; }
+var out = [];
+for (var j = 0; j < rows.length; j++) {
+    var r = rows[j], seq = +r.dataset.poSeq;
+    if (seq <= cursor) { continue; }
+    var res = r.matches('.trade-result') ? r.textContent.trim() : text(r, '.trade-result');
+    out.push({
+        seq: seq,
+        asset: text(r, '.asset-name'),
+        result_text: res,
+        amount_text: text(r, '.trade-amount, .amount'),
+        time_text: text(r, '.trade-time, .time'),
+        row_text: r.textContent.trim()
+    });
+}
+return {cursor: window.__poRowSeq, rows: out};
+"""
+HISTORY_ROWS = ".trade-history .trade-row, .trade-history .trade-item, .trade-history .history-item"
+HISTORY_ROWS_FALLBACK = ".trade-history .trade-result, .history-list .item"
+
+_AMOUNT_RE = re.compile(r"[-+]?\$?\s*(\d+(?:[.,]\d+)?)")
+
+
+def extract_trade_history(driver, cursor=0):
+    """
+    One round-trip for the whole trade history.
+    Returns (rows, new_cursor); pass new_cursor back to get only newer rows.
+    Each row: {'asset', 'result', 'raw_text', 'amount', 'timestamp_text', 'seq'}.
+    """
+    data = driver.execute_script(EXTRACT_SCRIPT, HISTORY_ROWS, cursor, HISTORY_ROWS_FALLBACK) or {}
+    rows = []
+    for r in data.get("rows") or []:
+        raw = r.get("result_text") or r.get("row_text") or ""
+        asset = r.get("asset")
+        if not asset:
+            # heuristic from the refactor: first token of the row may be the asset
+            parts = (r.get("row_text") or "").split()
+            if parts and len(parts[0].replace("/", "")) >= 6:
+                asset = parts[0].replace("/", "").upper()
+        amount = None
+        m = _AMOUNT_RE.search(r.get("amount_text") or raw)
+        if m:
+            try:
+                amount = float(m.group(1).replace(",", "."))
+            except ValueError:
+                amount = None
+        rows.append({
+            "asset": asset,
+            "result": classify_result(raw),
+            "raw_text": raw,
+            "amount": amount,
+            "timestamp_text": r.get("time_text"),
+            "seq": r.get("seq"),
+        })
+    return rows, data.get("cursor", cursor)
+
+
+def classify_result(text):
+    """'WIN' / 'LOSS' / None from a trade-history result cell (same rules as detect_trade_result)."""
+    txt = (text or "").strip()
+    if txt.startswith("+"):
+        return "WIN"
+    if txt == "$0":
+        return "LOSS"
+    return None
+
+
+class DomResultFeed:
+    def __init__(self, get_driver):
+        self._get_driver = get_driver
+        self.installed = False
+        self.ticks = 0
+
+    def poll(self):
+        """One round-trip: returns new result events [{'asset', 'result', 'raw_text', 'time_text', 'ts'}]."""
+        self.ticks += 1
+        try:
+            data = self._get_driver().execute_script(DRAIN_SCRIPT, HISTORY_CONTAINERS, ROW_SELECTOR) or {}
+        except Exception as e:
+            logger.debug(f"[⚠️] Result feed drain failed: {e}")
+            return []
+        if data.get("installed") and not self.installed:
+            logger.info("[👁️] Trade-history observer installed.")
+        self.installed = bool(data.get("installed"))
+        events = []
+        for item in data.get("items") or []:
+            result = classify_result(item.get("result_text"))
+            if result:
+                events.append({
+                    "asset": item.get("asset"),
+                    "result": result,
+                    "raw_text": item.get("result_text"),
+                    "time_text": item.get("time_text"),
+                    "ts": item.get("ts"),
+                })
+        return events
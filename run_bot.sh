@@ -19,10 +19,16 @@ if [ ! -f "$XAUTHORITY" ]; then
     echo "[⚠️] Created empty $XAUTHORITY. Ensure Xvfb is running."
 fi
 
-# Optional: verify Xvfb / X server is running
+# Optional: verify Xvfb / X server is running.
+# With ACTUATION_BACKEND=cdp (default) hotkeys go through Chrome DevTools,
+# so a missing X server only disables the pyautogui fallback.
 if ! xdpyinfo -display "$DISPLAY" >/dev/null 2>&1; then
-    echo "[❌] X server not detected on DISPLAY=$DISPLAY"
-    exit 1
+    if [ "${ACTUATION_BACKEND:-cdp}" = "cdp" ]; then
+        echo "[⚠️] X server not detected on DISPLAY=$DISPLAY — running headless (CDP actuation only)."
+    else
+        echo "[❌] X server not detected on DISPLAY=$DISPLAY"
+        exit 1
+    fi
 fi
 
 echo "[🚀] Starting core.py bot..."
@@ -0,0 +1,166 @@
+"""
+scheduler.py — single timer-heap scheduler for trade entries.
+
+- One dispatcher thread owns a heap of pending entries ordered by fire time.
+- Due entries are handed to a bounded worker pool, so thread count stays flat
+  no matter how many signals (and martingale levels) are queued.
+- schedule() returns a ScheduledEntry handle that can be cancelled.
+- pending() returns a snapshot of the queue for inspection (/status).
+- precise_wait() is the hand-off for the last stretch before an exact instant:
+  a coarse sleep to SPIN_SECONDS before it, then a spin on time.monotonic().
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 4  # trades that may execute at the same instant
+SPIN_SECONDS = 0.05  # final stretch before a precise_wait target that is spun, not slept
+
+
+def precise_wait(target_mono, spin=SPIN_SECONDS):
+    """
+    Block until time.monotonic() reaches target_mono. Returns how many seconds
+    past the target it returned (large if the target had already passed).
+    """
+    coarse = target_mono - spin - time.monotonic()
+    if coarse > 0:
+        time.sleep(coarse)  # may wake a few ms late; the spin window absorbs it
+    while True:
+        current = time.monotonic()
+        if current >= target_mono:
+            return current - target_mono
+
+
+class ScheduledEntry:
+    """Handle for one queued call. Ordered by (fire time, priority, sequence)."""
+
+    __slots__ = ("seq", "fire_mono", "when", "priority", "label", "tag",
+                 "fn", "args", "kwargs", "cancelled", "fired")
+
+    def __init__(self, seq, fire_mono, when, priority, label, tag, fn, args, kwargs):
+        self.seq = seq
+        self.fire_mono = fire_mono
+        self.when = when
+        self.priority = priority
+        self.label = label
+        self.tag = tag
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.fired = False
+
+    def __lt__(self, other):
+        return (self.fire_mono, self.priority, self.seq) < (other.fire_mono, other.priority, other.seq)
+
+    def cancel(self) -> bool:
+        """Cancel the entry if it has not fired yet. Returns True if cancelled."""
+        if self.fired or self.cancelled:
+            return False
+        self.cancelled = True
+        return True
+
+    def seconds_left(self) -> float:
+        return self.fire_mono - time.monotonic()
+
+
+class TradeScheduler:
+    def __init__(self, max_workers=MAX_WORKERS, name="trade-scheduler"):
+        self._heap = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # -----------------
+    # Queue API
+    # -----------------
+    def schedule(self, when, fn, *args, priority=0, label=None, tag=None, **kwargs) -> ScheduledEntry:
+        """
+        Queue fn(*args, **kwargs) to run at `when` (tz-aware datetime or monotonic seconds).
+        Lower priority values run first when two entries are due at the same instant.
+        """
+        if isinstance(when, datetime):
+            delay = (when - datetime.now(when.tzinfo)).total_seconds()
+            fire_mono = time.monotonic() + delay
+        else:
+            fire_mono = float(when)
+        entry = ScheduledEntry(next(self._seq), fire_mono, when, priority, label, tag, fn, args, kwargs)
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            self._cond.notify()
+        logger.debug(f"[🗓️] Scheduled {label or fn.__name__} in {entry.seconds_left():.1f}s")
+        return entry
+
+    def cancel_tag(self, tag) -> int:
+        """Cancel every queued entry carrying `tag`. Returns the number cancelled."""
+        count = 0
+        with self._cond:
+            for entry in self._heap:
+                if entry.tag == tag and entry.cancel():
+                    count += 1
+        return count
+
+    def pending(self):
+        """Snapshot of queued (non-cancelled) entries, soonest first."""
+        with self._cond:
+            entries = sorted(e for e in self._heap if not e.cancelled)
+        return [
+            {"label": e.label, "tag": e.tag, "priority": e.priority, "seconds_left": round(e.seconds_left(), 3)}
+            for e in entries
+        ]
+
+    def next_fire_in(self):
+        """Seconds until the next live entry fires, or None if the queue is empty."""
+        with self._cond:
+            live = [e.fire_mono for e in self._heap if not e.cancelled]
+        return (min(live) - time.monotonic()) if live else None
+
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._running = False
+            for entry in self._heap:
+                entry.cancel()
+            self._heap.clear()
+            self._cond.notify()
+        self._pool.shutdown(wait=wait)
+
+    # -----------------
+    # Dispatcher loop
+    # -----------------
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    while self._heap and self._heap[0].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    timeout = self._heap[0].fire_mono - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+                entry = heapq.heappop(self._heap)
+                entry.fired = True
+            try:
+                self._pool.submit(self._execute, entry)
+            except RuntimeError:
+                return  # pool shut down
+
+    def _execute(self, entry):
+        try:
+            entry.fn(*entry.args, **entry.kwargs)
+        except Exception as e:
+            logger.exception(f"[❌] Scheduled call {entry.label or entry.fn.__name__} failed: {e}")
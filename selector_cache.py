@@ -0,0 +1,158 @@
+"""
+selector_cache.py — learned selector registry for UI elements.
+
+Each UI element (asset dropdown, search input, ...) has a list of candidate
+selectors. The registry remembers which candidate last succeeded and how fast:
+
+- the last winner is tried first, with a short timeout;
+- if it fails, ALL candidates are probed in parallel by one JS call
+  (re-probed until the element's timeout), and the first visible match wins;
+- rankings (winner, hits, misses, average ms) are persisted to disk and
+  loaded again after a restart.
+
+Candidates may contain {placeholders} (e.g. {pair}) filled in at lookup time;
+stats are kept per template.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+SELECTOR_RANKINGS_PATH = os.getenv("SELECTOR_RANKINGS_PATH", "selector_rankings.json")
+WINNER_TIMEOUT = 1.5   # seconds to give the last winner before probing everything
+PROBE_INTERVAL = 0.2   # seconds between parallel JS probes
+
+# Returns [index, element] of the first candidate that is present (and visible if asked).
+PROBE_SCRIPT = """
+var cands = arguments[0], needVisible = arguments[1];
+for (var i = 0; i < cands.length; i++) {
+    var kind = cands[i][0], sel = cands[i][1], el = null;
+    try {
+        if (kind === 'xpath') {
+            el = document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } else {
+            el = document.querySelector(sel);
+        }
+    } catch (e) { el = null; }
+    if (el && (!needVisible || el.getClientRects().length)) { return [i, el]; }
+}
+return null;
+"""
+
+
+class SelectorRegistry:
+    def __init__(self, candidates, path=SELECTOR_RANKINGS_PATH):
+        """candidates: {element name: [(kind, selector), ...]} with kind 'css' or 'xpath'."""
+        self.candidates = {name: [tuple(c) for c in cands] for name, cands in candidates.items()}
+        self.path = path
+        self._stats = {}   # name -> {selector template: {"hits", "misses", "avg_ms"}}
+        self._winner = {}  # name -> selector template
+        self._lock = threading.Lock()
+        self._load()
+
+    # -----------------
+    # Lookup
+    # -----------------
+    def find(self, driver, name, timeout=8, clickable=False, **fmt):
+        """Returns the WebElement for `name`, or None if no candidate matched within timeout."""
+        ordered = self.ordered(name)
+        if not ordered:
+            return None
+        started = time.monotonic()
+
+        winner = ordered[0]
+        if self._winner.get(name) == winner[1]:
+            el = self._wait_one(driver, winner, min(WINNER_TIMEOUT, timeout), clickable, fmt)
+            if el is not None:
+                self._record(name, winner[1], True, started)
+                return el
+            self._record(name, winner[1], False, None)
+
+        # Parallel probe of every candidate until the element's timeout
+        concrete = [[kind, sel.format(**fmt)] for kind, sel in ordered]
+        deadline = started + timeout
+        while True:
+            try:
+                hit = driver.execute_script(PROBE_SCRIPT, concrete, True)
+            except Exception:
+                hit = None
+            if hit:
+                idx, el = int(hit[0]), hit[1]
+                self._record(name, ordered[idx][1], True, started)
+                return el
+            if time.monotonic() >= deadline:
+                logger.warning(f"[⚠️] No selector matched for '{name}' within {timeout}s.")
+                return None
+            time.sleep(PROBE_INTERVAL)
+
+    def ordered(self, name):
+        """Candidates for `name`: last winner first, then by hit rate and speed."""
+        cands = self.candidates.get(name, [])
+        with self._lock:
+            stats = self._stats.get(name, {})
+            winner = self._winner.get(name)
+
+        def rank(c):
+            s = stats.get(c[1], {})
+            hits, misses = s.get("hits", 0), s.get("misses", 0)
+            rate = hits / (hits + misses) if hits + misses else 0.0
+            return (c[1] != winner, -rate, s.get("avg_ms") or float("inf"))
+
+        return sorted(cands, key=rank)
+
+    def _wait_one(self, driver, cand, timeout, clickable, fmt):
+        kind, sel = cand
+        by = By.XPATH if kind == "xpath" else By.CSS_SELECTOR
+        cond = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+        try:
+            return WebDriverWait(driver, timeout).until(cond((by, sel.format(**fmt))))
+        except Exception:
+            return None
+
+    # -----------------
+    # Rankings
+    # -----------------
+    def _record(self, name, selector, ok, started):
+        with self._lock:
+            s = self._stats.setdefault(name, {}).setdefault(selector, {"hits": 0, "misses": 0, "avg_ms": None})
+            if ok:
+                ms = (time.monotonic() - started) * 1000
+                s["hits"] += 1
+                s["avg_ms"] = ms if s["avg_ms"] is None else round(0.7 * s["avg_ms"] + 0.3 * ms, 1)
+                changed = self._winner.get(name) != selector
+                self._winner[name] = selector
+            else:
+                s["misses"] += 1
+                changed = False
+            periodic = ok and s["hits"] % 10 == 0
+        if changed or periodic:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            data = {"winners": dict(self._winner), "stats": json.loads(json.dumps(self._stats))}
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.debug(f"[⚠️] Could not persist selector rankings: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        self._winner = dict(data.get("winners") or {})
+        self._stats = dict(data.get("stats") or {})
+        logger.info(f"[📚] Loaded selector rankings for {len(self._winner)} UI elements.")
@@ -1,23 +1,36 @@
 """
 Final selenium_integration.py — PocketOptionSelenium (updated with persistent dashboard & .env login).
 
-- Uses a unique --user-data-dir per session (UUID) to avoid "already in use" errors.
+- Reuses a locked persistent Chrome profile and saved session cookies (profile_store.py);
+  the login form is only filled when the dashboard is not already authenticated.
 - Uses signal's original timezone for scheduling and entry checks (no Jakarta time).
 - Provides:
-    - confirm_asset_ready(currency_pair, entry_time_dt) -> datetime in signal's tz
-    - set_timeframe(timeframe)
-    - detect_trade_result() -> scans trade history
-    - start_result_monitor() -> background thread to detect results and callback to core
-    - watch_trade_for_result(currency_pair, placed_at) -> targeted watcher
+    - select_asset(currency_pair) -> pooled tab switch for hot assets (tab_pool.py), else
+      dropdown + search switch (ported from the refactor) in the home tab;
+      element lookups go through the learned SelectorRegistry (selector_cache.py);
+      a no-op when the UI state cache (ui_state.py) already shows the pair
+    - confirm_asset_ready(currency_pair, entry_time_dt, timeframe) -> {'ready', 'asset', 'timeframe'}
+    - set_timeframe(timeframe) -> bool (no-op when the cached timeframe matches)
+    - UI operations run against latency budgets (pacing.py): event waits instead of
+      fixed sleeps, humanizing only when there is slack before the next entry
+    - verify_ui_state(currency_pair, timeframe) -> {'asset', 'timeframe'} (pre-arm check)
+    - detect_trade_result() -> scans trade history (one round-trip)
+    - detect_trade_result_structured(incremental) -> all history rows as dicts (one round-trip)
+    - start_result_monitor() -> single consumer of the DOM MutationObserver feed (result_feed.py);
+      rows are published to the trade manager's result bus (result_bus.py); the poll rate
+      follows the open trades' expiries (ExpiryPollSchedule), idle when nothing is open
 - Automatically fills login email & password from hardcoded credentials (testing)
 - Keeps Chrome window open indefinitely to stay connected to dashboard
+- Optional warm standby browser with liveness probe and automatic failover (failover.py)
+- Optional lean mode: no images/fonts/trackers, eager loads, capped frame rate (lean_browser.py)
 """
 
 import time
 import threading
 import random
-import uuid
-from datetime import datetime, timedelta
+import logging
+from contextlib import contextmanager
+from datetime import datetime
 import pytz
 import os
 from selenium import webdriver
@@ -26,9 +39,28 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pyautogui
+try:
+    import pyautogui
+except Exception:  # no X display: headless runs actuate through CDP (see actuator.py)
+    pyautogui = None
 from dotenv import load_dotenv  # kept for convenience if you revert to env later
 
+from result_feed import DomResultFeed, extract_trade_history
+from result_bus import BusResult, ExpiryPollSchedule
+from ws_listener import WS_CAPTURE, WebSocketListener, performance_logging_options
+from models import normalize_asset
+from selector_cache import SelectorRegistry
+from ui_state import UiStateTracker
+from pacing import Pacer, remaining, wait_until
+from tab_pool import TabPool
+from profile_store import ProfileStore
+from failover import STANDBY_BROWSER, DriverFailover
+from lean_browser import LEAN_BROWSER, apply_lean, lean_options
+from driver_owner import (DriverOwner, command_priority, set_thread_priority,
+                          PRIORITY_TRADE, PRIORITY_MONITOR, MONITOR_STALE_SECONDS)
+
+logger = logging.getLogger(__name__)
+
 CHECK_INTERVAL = 0.5  # seconds
 
 # ---------------------------
@@ -47,15 +79,56 @@ if not EMAIL or not PASSWORD:
     raise ValueError("[❌] EMAIL or PASSWORD not set. Please set them before running.")
 
 
+# Candidate selectors per UI element; SelectorRegistry learns which one works
+UI_SELECTORS = {
+    "asset_dropdown": [
+        ("css", "button.asset-selector"),
+        ("css", "div.asset-name-selector"),
+        ("css", ".asset-dropdown-opener"),
+        ("xpath", "//button[contains(@class,'asset') and (contains(., 'Assets') or contains(., 'Select'))]"),
+        ("css", ".header-asset-selector"),
+    ],
+    "asset_search": [
+        ("css", "input.asset-search"),
+        ("css", "input[placeholder*='Search']"),
+        ("css", "input[type='search']"),
+        ("xpath", "//input[contains(@class,'search') or contains(@placeholder,'Search')]"),
+    ],
+    "asset_result": [
+        ("xpath", "//div[contains(translate(., 'abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'), '{pair}') "
+                  "and (contains(@class,'asset') or contains(@class,'asset-item') or contains(@class,'option') or contains(@class,'list-item'))]"),
+    ],
+}
+
+
 class PocketOptionSelenium:
     def __init__(self, trade_manager, headless=False):
         self.trade_manager = trade_manager
         self.headless = headless
+        self.profile = ProfileStore()
         self.driver = self.setup_driver(headless)
+        self.driver_owner = DriverOwner(self.driver)  # all later WebDriver commands are prioritized
+        self.selectors = SelectorRegistry(UI_SELECTORS)
+        self.ui_state = UiStateTracker(lambda: self.driver)  # refreshed by the result monitor
+        scheduler = getattr(trade_manager, "scheduler", None)
+        self.pacer = Pacer(scheduler.next_fire_in if scheduler else None)
+        self.tab_pool = TabPool(self)
+        self.result_feed = DomResultFeed(lambda: self.driver)
+        self._history_cursor = 0
+        self.ws_listener = None
+        if WS_CAPTURE and hasattr(trade_manager, "on_market_event"):
+            self.ws_listener = WebSocketListener(lambda: self.driver, trade_manager.on_market_event)
+            self.ws_listener.start()
         self.monitor_thread = None
         self.start_result_monitor()
+        self.failover = None
+        if STANDBY_BROWSER:
+            self.failover = DriverFailover(self)
+            self.failover.start()
 
-    def setup_driver(self, headless=False):
+    def setup_driver(self, headless=False, profile=None):
+        started = time.monotonic()
+        profile = profile or self.profile
         chrome_options = Options()
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
@@ -65,20 +138,37 @@ class PocketOptionSelenium:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
 
-        # Unique user-data-dir to avoid session conflicts
-        session_id = str(uuid.uuid4())
-        chrome_options.add_argument(f"--user-data-dir=/tmp/chrome-user-data-{session_id}")
+        # Persistent profile if we can lock it, else a unique throwaway dir
+        chrome_options.add_argument(f"--user-data-dir={profile.acquire()}")
 
         # Keep window open always
         chrome_options.add_experimental_option("detach", True)
 
+        # CDP performance log for WebSocket frame capture (ws_listener.py)
+        if WS_CAPTURE:
+            performance_logging_options(chrome_options)
+
         if headless:
             # Note: headless with interactive actions might fail; use with caution.
             chrome_options.add_argument("--headless=new")
 
+        if LEAN_BROWSER:
+            lean_options(chrome_options)
+
         # Adjust path to chromedriver if needed
         service = Service("/usr/local/bin/chromedriver")
         driver = webdriver.Chrome(service=service, options=chrome_options)
+        if LEAN_BROWSER:
+            apply_lean(driver)  # before the first navigation
+
+        # Warm profile or saved cookies: no login form needed
+        try:
+            if profile.restore_session(driver):
+                logging.getLogger(__name__).info(f"[✅] Dashboard ready in {time.monotonic() - started:.1f}s (session reused).")
+                return driver
+        except Exception as e:
+            print(f"[⚠️] Session restore failed: {e}")
+
         driver.get("https://pocketoption.com/en/login/")
 
         logger = getattr(self.trade_manager, "logger", None)
@@ -168,115 +258,324 @@ class PocketOptionSelenium:
         except Exception as e:
             print(f"[⚠️] Auto-login failed: {e}")
 
+        # Keep the new session for the next restart
+        if profile.is_authenticated(driver, timeout=15):
+            profile.save_cookies(driver)
+            print(f"[✅] Dashboard ready in {time.monotonic() - started:.1f}s (logged in).")
+
         return driver
 
     # -----------------
     # Detect current asset visible in UI
     # -----------------
     def detect_asset(self, asset_name):
+        cached = self.ui_state.matches_asset(asset_name)
+        if cached is not None:
+            return cached
         try:
             el = self.driver.find_element(By.CSS_SELECTOR, ".asset-name-selector")
             current = el.text.strip()
-            return current == asset_name
+            return normalize_asset(current) == normalize_asset(asset_name)
+        except Exception:
+            return False
+
+    def detect_timeframe(self, timeframe):
+        cached = self.ui_state.matches_timeframe(timeframe)
+        if cached is not None:
+            return cached
+        try:
+            el = self.driver.find_element(By.CSS_SELECTOR, ".timeframe-selector .current")
+            return el.text.strip().upper() == timeframe.upper()
         except Exception:
             return False
 
     # -----------------
-    # Confirm if asset ready and entry time not elapsed
+    # Hold the chart on one asset: each tab has its own amount input, so trade and
+    # amount keys must reach the asset's tab, and nothing may switch away meanwhile
     # -----------------
-    def confirm_asset_ready(self, asset_name, entry_time_dt):
+    @contextmanager
+    def holding_asset(self, asset):
+        with self.tab_pool.lock:
+            with command_priority(PRIORITY_TRADE):
+                if not self.tab_pool.activate(asset) and not self.detect_asset(asset):
+                    self.tab_pool.ensure_home()  # cold assets live in the home tab
+            yield
+
+    # -----------------
+    # Confirm if asset ready and entry time not elapsed (grace covers scheduler jitter)
+    # -----------------
+    def confirm_asset_ready(self, asset_name, entry_time_dt, timeframe=None, grace_seconds=2.0):
+        info = {'ready': False, 'asset': False, 'timeframe': None}
         try:
-            now = datetime.now(entry_time_dt.tzinfo)
-            if now > entry_time_dt:
-                return False
+            late = (datetime.now(entry_time_dt.tzinfo) - entry_time_dt).total_seconds()
+            if late > grace_seconds:
+                return info
         except Exception:
             pass
-        return self.detect_asset(asset_name)
+        with command_priority(PRIORITY_TRADE):
+            info['asset'] = self.detect_asset(asset_name)
+            if timeframe:
+                info['timeframe'] = self.detect_timeframe(timeframe)
+        info['ready'] = info['asset']
+        return info
+
+    # -----------------
+    # Pre-arm verification: is the UI already showing asset + timeframe?
+    # -----------------
+    def verify_ui_state(self, asset_name, timeframe="M1"):
+        return {'asset': self.detect_asset(asset_name), 'timeframe': self.detect_timeframe(timeframe)}
+
+    # -----------------
+    # Select asset: opens dropdown, types pair (no slash), clicks first result (prefer OTC)
+    # -----------------
+    def select_asset(self, currency_pair: str, max_attempts: int = 3, deadline=None) -> bool:
+        """
+        Clicks the currency dropdown, finds the search input, types the pair and clicks the first returned result.
+        deadline (monotonic) caps the operation's own latency budget.
+        Returns True on success, False on failure.
+        """
+        normalized_pair = normalize_asset(currency_pair)
+        if self.ui_state.matches_asset(normalized_pair):
+            self.ui_state.skipped_switch()
+            logger.info(f"[🖥️] {normalized_pair} already on screen — asset switch skipped.")
+            return True
+        with self.tab_pool.lock:
+            if self.tab_pool.activate(normalized_pair):
+                logger.info(f"[🗂️] Switched to the pooled tab for {normalized_pair}.")
+                return True
+            self.tab_pool.ensure_home()
+            self.tab_pool.note_use(normalized_pair)
+            return self._select_via_dropdown(normalized_pair, deadline)
+
+    def _select_via_dropdown(self, normalized_pair, deadline=None):
+        """The dropdown + search path in the current tab."""
+        currency_pair = normalized_pair
+        logger.info(f"[🔎] select_asset called for '{currency_pair}' -> normalized '{normalized_pair}'")
+        deadline = self.pacer.deadline("select_asset", deadline)
+        try:
+            # 1) Click/open the asset dropdown (learned selector, winner first)
+            elem = self.selectors.find(self.driver, "asset_dropdown", timeout=remaining(deadline), clickable=True)
+            if elem is None:
+                logger.warning("[⚠️] Could not open asset dropdown.")
+                return False
+            try:
+                elem.click()
+            except Exception:
+                self.driver.execute_script("arguments[0].click();", elem)
+
+            # 2) Find the search input inside the dropdown
+            search_input = self.selectors.find(self.driver, "asset_search", timeout=remaining(deadline))
+            if search_input is None:
+                logger.warning("[⚠️] Search input not found inside asset dropdown.")
+                return False
+
+            # 3) Type/paste the pair
+            try:
+                search_input.clear()
+                # send as text; clipboard paste can be used as alternative
+                search_input.send_keys(normalized_pair)
+                logger.debug(f"[🔤] Typed into search input: {normalized_pair}")
+            except Exception as e:
+                logger.warning(f"[⚠️] Failed typing into search input: {e}")
+                return False
+
+            # 4) Wait for the first result (we expect it to contain the normalized_pair); the wait is the filter delay
+            try:
+                # many sites wrap options in a div with 'asset' or 'option' class - we search broadly
+                result_elem = self.selectors.find(self.driver, "asset_result", timeout=remaining(deadline), clickable=True, pair=normalized_pair)
+                if result_elem is None:
+                    raise RuntimeError("no asset result matched")
+                txt = result_elem.text.strip().upper()
+                if normalized_pair not in txt:
+                    logger.debug(f"[⚠️] Top result text does not contain '{normalized_pair}': '{txt[:80]}'")
+                # click result (try direct then JS fallback)
+                try:
+                    result_elem.click()
+                except Exception:
+                    self.driver.execute_script("arguments[0].click();", result_elem)
+                logger.info(f"[✅] select_asset succeeded for {currency_pair} (selected: {txt[:80]})")
+                # Event wait: the header widget shows the new pair (instead of a fixed 0.7s)
+                if wait_until(self.driver, lambda d: self._shows_asset(d, normalized_pair), deadline):
+                    self.ui_state.note_asset(normalized_pair)
+                else:
+                    logger.debug(f"[⏱️] {normalized_pair} not confirmed on screen within the budget.")
+                return True
+            except Exception as e:
+                logger.warning(f"[⚠️] Could not find/click the asset result for '{normalized_pair}': {e}")
+                try:
+                    fn = f"select_asset_fail_{normalized_pair}_{int(time.time())}.png"
+                    self.driver.save_screenshot(fn)
+                    logger.info(f"[ℹ️] Saved screenshot to {fn}")
+                except Exception:
+                    pass
+                return False
+
+        except Exception as e:
+            logger.exception(f"[❌] Unexpected error in select_asset: {e}")
+            return False
+
+
+    # -----------------
+    # Tab switch (tab_pool.py): the outgoing tab's result queue is delivered first;
+    # the incoming tab's queue holds rows the active tab already delivered, so it is
+    # discarded unless nothing was polled meanwhile (discard=False)
+    # -----------------
+    def _switch_window(self, handle, asset=None, timeframe=None, discard=True):
+        with command_priority(PRIORITY_TRADE):
+            self._deliver_dom_events(self.result_feed.poll())
+            self.driver.switch_to.window(handle)
+            incoming = self.result_feed.poll()
+            if not discard:
+                self._deliver_dom_events(incoming)
+        self.ui_state.invalidate()
+        if asset:
+            self.ui_state.note_asset(asset)
+        if timeframe:
+            self.ui_state.note_timeframe(timeframe)
+
+    # -----------------
+    # Driver swap (failover.py, memory_watchdog.py): the previous DriverOwner must already
+    # be shut down. Resets per-driver state and re-applies the last known asset/timeframe.
+    # -----------------
+    def install_driver(self, driver, profile, asset=None, timeframe=None):
+        self.driver, self.profile = driver, profile
+        self.driver_owner = DriverOwner(driver)
+        self.tab_pool.reset()
+        self.ui_state.invalidate()
+        self.result_feed.installed = False
+        self._history_cursor = 0
+        if self.ws_listener:
+            self.ws_listener.attach()
+        self.restore_ui_state(asset, timeframe)
+
+    def restore_ui_state(self, asset, timeframe):
+        # both calls are no-ops if the page already shows it
+        with command_priority(PRIORITY_TRADE):
+            self.ui_state.refresh()
+            if asset:
+                self.select_asset(asset)
+            if timeframe:
+                self.set_timeframe(timeframe)
+
+    @staticmethod
+    def _shows_asset(driver, normalized_pair):
+        try:
+            return normalize_asset(driver.find_element(By.CSS_SELECTOR, ".asset-name-selector").text) == normalized_pair
+        except Exception:
+            return False
 
     # -----------------
     # Set timeframe by dropdown (M1/M5)
     # -----------------
-    def set_timeframe(self, timeframe="M1"):
+    def set_timeframe(self, timeframe="M1", deadline=None):
+        if self.ui_state.matches_timeframe(timeframe):
+            self.ui_state.skipped_switch()
+            return True
+        deadline = self.pacer.deadline("set_timeframe", deadline)
         try:
             current_element = self.driver.find_element(By.CSS_SELECTOR, ".timeframe-selector .current")
             current_text = current_element.text.strip().upper()
             if current_text == timeframe.upper():
-                return
+                self.ui_state.note_timeframe(timeframe)
+                return True
             current_element.click()
-            time.sleep(0.3)
-            options = self.driver.find_elements(By.CSS_SELECTOR, ".timeframe-selector .option")
+            options = wait_until(
+                self.driver, lambda d: d.find_elements(By.CSS_SELECTOR, ".timeframe-selector .option"), deadline
+            ) or []
+            confirmed = False
             for opt in options:
                 if opt.text.strip().upper() == timeframe.upper():
                     opt.click()
-                    time.sleep(0.2)
+                    confirmed = bool(wait_until(
+                        self.driver,
+                        lambda d: d.find_element(By.CSS_SELECTOR, ".timeframe-selector .current").text.strip().upper()
+                        == timeframe.upper(),
+                        deadline,
+                    ))
                     break
-            # keep original pyautogui click (may cause VNC issues in some setups)
-            try:
-                pyautogui.click(random.randint(100, 300), random.randint(100, 300))
-            except Exception:
-                # ignore pyautogui failure (headless/VNC may not support it)
-                pass
+            if not confirmed:
+                # the cache must not claim a timeframe the page never showed
+                self.ui_state.invalidate()
+                print(f"[❌] set_timeframe: {timeframe} not confirmed on screen")
+                return False
+            # keep original pyautogui click (may cause VNC issues in some setups), but only with slack
+            if pyautogui is not None:
+                self.pacer.humanize(
+                    0.2, 1.0, deadline,
+                    action=lambda: pyautogui.click(random.randint(100, 300), random.randint(100, 300)),
+                )
+            self.ui_state.note_timeframe(timeframe)
+            self.tab_pool.note_timeframe(timeframe)
             print(f"[🎯] Timeframe set to {timeframe}")
+            return True
         except Exception as e:
             print(f"[❌] set_timeframe failed: {e}")
+            return False
 
     # -----------------
     # Parse trade-results in history DOM; returns 'WIN' or 'LOSS' or None
     # -----------------
     def detect_trade_result(self):
+        for row in self.detect_trade_result_structured():
+            if row['result']:
+                return row['result']
+        return None
+
+    # -----------------
+    # Whole trade history in one execute_script; incremental=True only returns rows
+    # newer than the previous incremental call
+    # -----------------
+    def detect_trade_result_structured(self, incremental=False):
+        cursor = self._history_cursor if incremental else 0
         try:
-            elems = self.driver.find_elements(By.CSS_SELECTOR, ".trade-history .trade-result")
-            for e in elems:
-                txt = e.text.strip()
-                if txt.startswith("+"):
-                    return "WIN"
-                if txt == "$0":
-                    return "LOSS"
-            return None
+            rows, new_cursor = extract_trade_history(self.driver, cursor)
         except Exception:
-            return None
+            return []
+        if incremental:
+            self._history_cursor = new_cursor
+        return rows
 
     # -----------------
     # Generic background monitor: calls trade_manager.on_trade_result
     # -----------------
     def start_result_monitor(self):
+        bus = getattr(self.trade_manager, "results", None)
+        schedule = ExpiryPollSchedule(bus) if bus else None
+
         def monitor():
+            set_thread_priority(PRIORITY_MONITOR, stale_after=MONITOR_STALE_SECONDS)
+            next_ui = next_poll = 0.0
             while True:
-                result = self.detect_trade_result()
-                if result:
-                    try:
-                        with self.trade_manager.pending_lock:
-                            pending_currencies = set(
-                                [t['currency_pair'] for t in self.trade_manager.pending_trades
-                                 if not t['resolved'] and t.get('placed_at')]
-                            )
-                    except Exception:
-                        pending_currencies = set()
-                    for currency in pending_currencies:
-                        try:
-                            self.trade_manager.on_trade_result(currency, result)
-                        except Exception:
-                            pass
-                time.sleep(CHECK_INTERVAL)
+                now = time.monotonic()
+                # UI cache, tab warming and cookies keep the fixed cadence
+                if now >= next_ui:
+                    self.ui_state.refresh()
+                    self.tab_pool.maybe_warm()
+                    self.profile.maybe_save_cookies(self.driver)
+                    next_ui = time.monotonic() + CHECK_INTERVAL
+                # result polling follows the open trades' expiries; none while the socket delivers results
+                if now >= next_poll:
+                    if not (self.ws_listener and self.ws_listener.healthy()):
+                        self._deliver_dom_events(self.result_feed.poll())
+                        if bus:
+                            bus.note_poll()
+                    next_poll = time.monotonic() + (schedule.interval() if schedule else CHECK_INTERVAL)
+                time.sleep(max(0.01, min(next_ui, next_poll) - time.monotonic()))
 
         self.monitor_thread = threading.Thread(target=monitor, daemon=True)
         self.monitor_thread.start()
 
-    # -----------------
-    # Optional targeted watch: observe results after a specific placed_at timestamp
-    # -----------------
-    def watch_trade_for_result(self, currency_pair, placed_at):
-        def watch():
-            deadline = datetime.now(placed_at.tzinfo) + timedelta(seconds=60)
-            while datetime.now(placed_at.tzinfo) < deadline:
-                res = self.detect_trade_result()
-                if res:
-                    try:
-                        self.trade_manager.on_trade_result(currency_pair, res)
-                    except Exception:
-                        pass
-                    return
-                time.sleep(0.5)
-
-        threading.Thread(target=watch, daemon=True).start()
-    
+    def _deliver_dom_events(self, events):
+        if self.ws_listener and self.ws_listener.healthy():
+            return  # WebSocket results are authoritative while frames are flowing
+        bus = getattr(self.trade_manager, "results", None)
+        if bus is None:
+            return
+        for event in events:
+            # the same row re-seen (tab switch, re-installed observer) gets the same id
+            event_id = f"dom:{normalize_asset(event['asset'])}:{event['raw_text']}:{event['time_text'] or event['ts']}"
+            ts = event['ts'] / 1000 if event['ts'] else time.time()
+            try:
+                bus.publish(BusResult(event_id, event['asset'], event['result'], ts, "dom"))
+            except Exception as e:
+                logger.error(f"[❌] Result delivery failed for {event}: {e}")
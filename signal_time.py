@@ -0,0 +1,133 @@
+"""
+signal_time.py — one place to turn signal "HH:MM" strings into tz-aware datetimes.
+
+- Source labels ("Cameroon", "UTC-4", "OTC-3", ...) resolve to a cached tz object.
+- Each zone's date and UTC offset are computed once per local day and reused
+  until the next local midnight.
+- A time that already passed today is taken as tomorrow only if tomorrow's is
+  at most ROLLOVER_HOURS ahead (a signal posted just before midnight for just
+  after it); any other passed time stays passed and the signal is skipped.
+- resolve_signal_times() converts the entry and every martingale time of a
+  signal in one call, against a single "now".
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytz
+
+DEFAULT_SOURCE = "UTC-3"
+ROLLOVER_HOURS = 2  # a passed time means tomorrow only if tomorrow's is at most this far ahead
+
+# Signal source label -> tz. Fixed offsets are used for the "UTC±N" style labels.
+SOURCE_ZONES = {
+    "cameroon": pytz.timezone("Africa/Douala"),
+    "utc-4": pytz.FixedOffset(-240),
+    "utc-3": pytz.FixedOffset(-180),
+    "otc-3": pytz.FixedOffset(-180),
+    "utc": pytz.UTC,
+}
+
+
+class _DayInfo:
+    __slots__ = ("date", "tzinfo", "valid_until")
+
+    def __init__(self, date, tzinfo, valid_until):
+        self.date = date
+        self.tzinfo = tzinfo
+        self.valid_until = valid_until  # UTC timestamp of the next local midnight
+
+
+class SignalClock:
+    def __init__(self):
+        self._zones = {}
+        self._days = {}
+        self._lock = threading.Lock()
+
+    # -----------------
+    # Zone and daily offset caches
+    # -----------------
+    def zone(self, source):
+        key = (source or DEFAULT_SOURCE).lower().strip()
+        tz = self._zones.get(key)
+        if tz is None:
+            tz = SOURCE_ZONES.get(key)
+            if tz is None:
+                try:
+                    tz = pytz.timezone(source)
+                except Exception:
+                    tz = pytz.UTC
+            self._zones[key] = tz
+        return tz
+
+    def _day(self, source, now_utc):
+        key = (source or DEFAULT_SOURCE).lower().strip()
+        info = self._days.get(key)
+        now_ts = now_utc.timestamp()
+        if info is not None and now_ts < info.valid_until:
+            return info
+        tz = self.zone(source)
+        local_now = now_utc.astimezone(tz)
+        midnight = tz.normalize(local_now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1))
+        info = _DayInfo(local_now.date(), timezone(local_now.utcoffset()), midnight.timestamp())
+        with self._lock:
+            self._days[key] = info
+        return info
+
+    # -----------------
+    # Conversion
+    # -----------------
+    @staticmethod
+    def _parse_hhmm(value):
+        parts = value.strip().split(":")
+        h, m = int(parts[0]), int(parts[1])
+        s = int(parts[2]) if len(parts) > 2 else 0
+        return h, m, s
+
+    def resolve(self, value, source, now_utc=None):
+        """Single time -> tz-aware datetime in the source zone, or None if passed/invalid."""
+        entry, _ = self.resolve_signal_times(value, (), source, now_utc)
+        return entry
+
+    def resolve_signal_times(self, entry_time, martingale_times, source, now_utc=None):
+        """
+        Convert a signal's entry time and martingale times in one pass.
+        Returns (entry_dt or None, [martingale datetimes still in the future]).
+        Martingale times earlier than the entry roll over to the next day.
+        """
+        now_utc = now_utc or datetime.now(pytz.utc)
+        day = self._day(source, now_utc)
+        now_local = now_utc.astimezone(day.tzinfo)
+
+        def to_dt(value, not_before):
+            if isinstance(value, datetime):
+                return value
+            try:
+                h, m, s = self._parse_hhmm(value)
+                dt = datetime(day.date.year, day.date.month, day.date.day, h, m, s, tzinfo=day.tzinfo)
+            except Exception:
+                return None
+            if dt < not_before and dt + timedelta(days=1) - not_before <= timedelta(hours=ROLLOVER_HOURS):
+                dt += timedelta(days=1)
+            return dt
+
+        entry_dt = to_dt(entry_time, now_local)
+        if entry_dt is None or entry_dt < now_local:
+            return None, []
+
+        mg_times = []
+        for t in martingale_times:
+            mg = to_dt(t, entry_dt)
+            if mg is not None and mg >= now_local:
+                mg_times.append(mg)
+        return entry_dt, mg_times
+
+
+# -----------------
+# Shared instance
+# -----------------
+signal_clock = SignalClock()
+
+
+def resolve_signal_times(entry_time, martingale_times, source, now_utc=None):
+    return signal_clock.resolve_signal_times(entry_time, martingale_times, source, now_utc)
@@ -0,0 +1,245 @@
+"""
+tab_pool.py — pre-loaded browser tabs for hot assets.
+
+Switching assets through the dropdown is the slowest UI operation. Our
+channels trade a handful of pairs over and over, so every asset that has been
+switched to HOT_THRESHOLD times (or is listed in HOT_ASSETS) gets its own tab
+with the asset and timeframe already selected. A later switch to that asset is
+a window-handle switch.
+
+- Tabs are opened on a background thread, only while the scheduler has at
+  least WARM_MIN_SLACK seconds before the next entry and no placed trade is
+  waiting for its result (warming holds the tab lock for a few seconds).
+- Least recently used tabs are closed when the pool exceeds TAB_POOL_SIZE or
+  Chrome's resident memory exceeds TAB_POOL_MAX_MB (by default below the memory
+  watchdog's reload threshold, so the pool gives way first).
+- shrink() is the watchdog's first step under memory pressure: all pooled tabs
+  are closed and the pool keeps one tab fewer from then on.
+- Cold assets keep using the dropdown, always in the home tab, so pooled tabs
+  never change asset.
+
+TAB_POOL_SIZE=0 disables the pool.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from driver_owner import command_priority, PRIORITY_PREARM
+from procinfo import process_tree_rss_mb
+from lean_browser import LEAN_BROWSER, apply_lean
+from memory_watchdog import RSS_RELOAD_MB
+from models import normalize_asset
+
+logger = logging.getLogger(__name__)
+
+TAB_POOL_SIZE = int(os.getenv("TAB_POOL_SIZE", "3"))
+TAB_POOL_MAX_MB = float(os.getenv("TAB_POOL_MAX_MB", str(RSS_RELOAD_MB * 0.8)))
+HOT_ASSETS = [a.strip() for a in os.getenv("HOT_ASSETS", "").split(",") if a.strip()]
+HOT_THRESHOLD = 2       # dropdown switches before an asset gets a tab
+WARM_MIN_SLACK = 60.0   # seconds before the next scheduled entry required to open a tab
+WARM_BUDGET = 20.0      # seconds one warm-up may take
+
+
+class TabPool:
+    def __init__(self, selenium, size=TAB_POOL_SIZE, max_mb=TAB_POOL_MAX_MB, hot_assets=HOT_ASSETS):
+        self.selenium = selenium
+        self.size = size
+        self.max_mb = max_mb
+        self.home = None
+        self.active = None
+        self.tabs = OrderedDict()  # asset -> {'handle', 'timeframe'}, least recently used first
+        self.uses = Counter()
+        for asset in hot_assets:
+            self.uses[normalize_asset(asset)] = HOT_THRESHOLD
+        self.lock = threading.RLock()  # window switches from prearm, trades and warming never interleave
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._warming = False
+
+    @property
+    def driver(self):
+        return self.selenium.driver
+
+    # -----------------
+    # Hot path
+    # -----------------
+    def activate(self, asset):
+        """Switch to the asset's tab. Returns True on a pool hit, False for a cold asset."""
+        asset = normalize_asset(asset)
+        with self.lock:
+            tab = self.tabs.get(asset)
+            if not tab:
+                self.misses += 1
+                return False
+            try:
+                if self.active != tab['handle']:
+                    self._switch(tab['handle'], asset, tab['timeframe'])
+            except Exception as e:
+                logger.warning(f"[⚠️] Pooled tab for {asset} is gone ({e}); falling back to the dropdown.")
+                self.tabs.pop(asset, None)
+                self.misses += 1
+                return False
+            self.tabs.move_to_end(asset)
+            self.hits += 1
+            return True
+
+    def ensure_home(self):
+        """Cold switches happen in the home tab so pooled tabs keep their asset."""
+        with self.lock:
+            if self.home is None:
+                self.home = self.active = self.driver.current_window_handle
+            elif self.active != self.home:
+                self._switch(self.home)
+
+    def reset(self):
+        """Forget every tab (the driver they belonged to was replaced)."""
+        with self.lock:
+            self.tabs.clear()
+            self.home = self.active = None
+
+    def shrink(self):
+        """Close every pooled tab and allow one fewer from now on. Returns the number closed."""
+        with self.lock:
+            if not self.tabs:
+                return 0
+            self.ensure_home()
+            closed = len(self.tabs)
+            for tab in self.tabs.values():
+                self._close(tab['handle'])
+            self.tabs.clear()
+            self.evictions += closed
+            self.size = max(0, self.size - 1)
+            return closed
+
+    def note_use(self, asset):
+        self.uses[normalize_asset(asset)] += 1
+
+    def note_timeframe(self, timeframe):
+        with self.lock:
+            for tab in self.tabs.values():
+                if tab['handle'] == self.active:
+                    tab['timeframe'] = timeframe
+
+    def _switch(self, handle, asset=None, timeframe=None, discard=True):
+        self.selenium._switch_window(handle, asset, timeframe, discard)
+        self.active = handle
+
+    # -----------------
+    # Warming (checked from the result monitor every tick; the work runs on its own thread)
+    # -----------------
+    def maybe_warm(self):
+        """Start warming the next hot asset if the bot is quiet. Returns True if a warm-up started."""
+        if self.size <= 0 or self._warming:
+            return False
+        asset = self._next_hot()
+        if not asset or not self._quiet():
+            return False
+        self._warming = True
+        threading.Thread(target=self._warm_background, args=(asset,), name="tab-warm", daemon=True).start()
+        return True
+
+    def _quiet(self):
+        slack = self.selenium.pacer.slack()
+        if slack is not None and slack < WARM_MIN_SLACK:
+            return False
+        bus = getattr(self.selenium.trade_manager, "results", None)
+        return not (bus and bus.expiries())  # placed trades are expiring: results and resets come first
+
+    def _warm_background(self, asset):
+        try:
+            with command_priority(PRIORITY_PREARM):
+                self.warm(asset)
+        except Exception as e:
+            logger.warning(f"[⚠️] Warming a tab for {asset} failed: {e}")
+        finally:
+            self._warming = False
+
+    def _next_hot(self):
+        for asset, count in self.uses.most_common():
+            if count < HOT_THRESHOLD:
+                return None
+            if asset not in self.tabs:
+                return asset
+        return None
+
+    def warm(self, asset, timeframe=None):
+        asset = normalize_asset(asset)
+        timeframe = timeframe or self.selenium.ui_state.timeframe or "M1"
+        started = time.monotonic()
+        deadline = started + WARM_BUDGET
+        with self.lock:
+            self.ensure_home()
+            back = self.active
+            handle = None
+            try:
+                url = self.driver.current_url
+                self.driver.switch_to.new_window('tab')
+                handle = self.active = self.driver.current_window_handle
+                self.selenium.ui_state.invalidate()
+                if LEAN_BROWSER:
+                    apply_lean(self.driver)
+                self.driver.get(url)
+                ok = self.selenium._select_via_dropdown(asset, deadline=deadline)
+                ok = ok and self.selenium.set_timeframe(timeframe, deadline=deadline)
+            except Exception as e:
+                logger.warning(f"[⚠️] Warming a tab for {asset} failed: {e}")
+                ok = False
+            if ok:
+                self.tabs[asset] = {'handle': handle, 'timeframe': timeframe}
+                logger.info(f"[🗂️] Tab for {asset} {timeframe} ready in {time.monotonic() - started:.1f}s "
+                            f"({len(self.tabs)}/{self.size} pooled).")
+            else:
+                self.uses[asset] = 0  # do not retry every tick; it must become hot again
+                if handle:
+                    self._close(handle)
+            # nothing was polled while warming: deliver (not discard) what the home tab queued
+            self._switch(back, discard=False)
+            self._enforce_limits()
+        return ok
+
+    # -----------------
+    # Eviction
+    # -----------------
+    def _enforce_limits(self):
+        while self.tabs and (len(self.tabs) > self.size or self._over_memory()):
+            victim = next((a for a, t in self.tabs.items() if t['handle'] != self.active), None)
+            if victim is None:
+                return
+            tab = self.tabs.pop(victim)
+            self._close(tab['handle'])
+            self.evictions += 1
+            logger.info(f"[🗂️] Closed LRU tab for {victim}.")
+
+    def _close(self, handle):
+        back = self.active
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except Exception as e:
+            logger.debug(f"[⚠️] Closing tab failed: {e}")
+        if back and back != handle:
+            self.driver.switch_to.window(back)
+
+    def rss_mb(self):
+        try:
+            return process_tree_rss_mb(self.driver.service.process.pid)
+        except Exception:
+            return 0.0
+
+    def _over_memory(self):
+        return self.max_mb > 0 and self.rss_mb() > self.max_mb
+
+    def stats(self):
+        with self.lock:
+            return {
+                "tabs": list(self.tabs),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": self.size,
+                "rss_mb": self.rss_mb(),
+            }
@@ -1,8 +1,9 @@
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
 
 from shared import trade_manager  # ✅ Use the singleton created in core.py
+from signal_time import signal_clock
 
 
 # --------------------------
@@ -26,33 +27,13 @@ async def signal_callback(signal: dict, raw_message=None):
     msg_source = signal.get("source", "OTC-3")
 
     # --------------------------
-    # Determine timezone
-    # --------------------------
-    if msg_source == "UTC-4":
-        tz = pytz.timezone("America/New_York")
-    elif msg_source == "Cameroon":
-        tz = pytz.timezone("Africa/Douala")
-    else:
-        tz = pytz.timezone("UTC-3")  # Default OTC-3
-
-    now_utc = datetime.utcnow().replace(tzinfo=pytz.UTC)
-
-    # --------------------------
-    # Handle entry_time
+    # Resolve entry + martingale times (shared cached tz engine)
     # --------------------------
     entry_time_val = signal.get("entry_time")
     try:
-        if isinstance(entry_time_val, datetime):
-            entry_dt_local = entry_time_val.astimezone(tz)
-        elif isinstance(entry_time_val, str):
-            fmt = "%H:%M"
-            entry_dt_local = tz.localize(datetime.combine(datetime.now(tz).date(), datetime.strptime(entry_time_val, fmt).time()))
-        else:
-            logging.error(f"[❌] entry_time has invalid type: {type(entry_time_val)}")
-            return
-
-        entry_dt_utc = entry_dt_local.astimezone(pytz.UTC)
-        delta_sec = (entry_dt_utc - now_utc).total_seconds()
+        entry_dt_local, mg_times_fixed = signal_clock.resolve_signal_times(
+            entry_time_val, signal.get("martingale_times", []), msg_source
+        )
     except Exception as e:
         logging.error(f"[❌] Failed to parse entry_time '{entry_time_val}': {e}")
         return
@@ -60,27 +41,16 @@ async def signal_callback(signal: dict, raw_message=None):
     # --------------------------
     # Validate timing
     # --------------------------
-    if delta_sec < 0:
-        logging.info(f"[⏹️] Signal entry time {entry_dt_local.strftime('%H:%M')} already passed. Ignored.")
+    if entry_dt_local is None:
+        logging.info(f"[⏹️] Signal entry time {entry_time_val} already passed or invalid. Ignored.")
         return
-    elif delta_sec > 10*60:
+    delta_sec = (entry_dt_local - datetime.now(pytz.UTC)).total_seconds()
+    if delta_sec > 10*60:
         logging.info(f"[⚠️] Signal entry time {entry_dt_local.strftime('%H:%M')} too far in the future (>10min). Ignored.")
         return
 
     logging.info(f"[📩] Signal received for {signal['currency_pair']} ({signal['direction']}) at {entry_dt_local.strftime('%H:%M')} {msg_source} — scheduling trade 🔥")
 
-    # --------------------------
-    # Ensure martingale times are datetime objects
-    # --------------------------
-    mg_times_fixed = []
-    for t in signal.get("martingale_times", []):
-        try:
-            if isinstance(t, datetime):
-                mg_times_fixed.append(t.astimezone(tz))
-            elif isinstance(t, str):
-                mg_times_fixed.append(tz.localize(datetime.combine(datetime.now(tz).date(), datetime.strptime(t, "%H:%M").time())))
-        except Exception as e:
-            logging.warning(f"[⚠️] Invalid martingale time '{t}': {e}")
     signal['martingale_times'] = mg_times_fixed
     signal['entry_time'] = entry_dt_local
 
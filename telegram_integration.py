@@ -8,6 +8,8 @@ from telethon import TelegramClient, events
 import re
 from datetime import datetime, timedelta
 
+from latency import latency, now
+
 # =========================
 # HARD-CODED CREDENTIALS
 # =========================
@@ -44,6 +46,7 @@ def start_telegram_listener(signal_callback, command_callback):
 
     @client.on(events.NewMessage())
     async def handler(event):
+        received = now()
         # Only process messages from the target channel
         target_id = getattr(channel_entity, 'id', None)
         if event.chat_id != target_id:
@@ -58,6 +61,9 @@ def start_telegram_listener(signal_callback, command_callback):
         else:
             signal = parse_signal(text)
             if signal['currency_pair'] and signal['entry_time']:
+                stamps = {'received': received}
+                latency.stamp(stamps, 'parsed', signal['currency_pair'])
+                signal['stamps'] = stamps
                 print(f"[⚡] Parsed signal: {signal}")
                 await signal_callback(signal)
 
@@ -0,0 +1,196 @@
+"""
+trade_store.py — indexed store for pending trades, sharded per asset.
+
+- Lookup by trade id.
+- One AssetBook per asset, each with its own lock: FIFO of placed-but-unresolved
+  trades (result callbacks pop the head), latest trade per martingale level,
+  and the martingale increase count. Work on one asset never waits on another.
+- Time-ordered heap over entry times for expiry/cleanup (its own small lock).
+- Bounded ledger: resolved trades go to a ring buffer of the last N, and
+  compact() caps the live set by size and age so memory stays flat.
+
+All operations are O(1) or O(log n); nothing copies or sorts the full set.
+Callers must not do I/O (hotkeys, WebDriver) while holding a book lock.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from models import TradeResult
+
+LEDGER_HISTORY_SIZE = 200      # resolved trades kept for status queries
+LEDGER_MAX_TRADES = 500        # hard cap on live (indexed) trades
+LEDGER_MAX_AGE_SECONDS = 30 * 60  # trades older than this are compacted away
+
+
+class AssetBook:
+    """Trade state for a single asset. Guard multi-step updates with `lock`."""
+
+    __slots__ = ("asset", "lock", "unresolved", "open", "by_level", "increase_count")
+
+    def __init__(self, asset):
+        self.asset = asset
+        self.lock = threading.RLock()
+        self.unresolved = {}    # trade_id -> trade, insertion ordered
+        self.open = deque()     # placed, unresolved trades (placement order)
+        self.by_level = {}      # level -> most recent trade
+        self.increase_count = 0
+
+
+class TradeStore:
+    def __init__(self, history_size=LEDGER_HISTORY_SIZE, max_trades=LEDGER_MAX_TRADES,
+                 max_age_seconds=LEDGER_MAX_AGE_SECONDS):
+        self.max_trades = max_trades
+        self.max_age_seconds = max_age_seconds
+        self.history = deque(maxlen=history_size)
+        self._books = {}        # asset -> AssetBook (bounded by the number of traded pairs)
+        self._books_lock = threading.Lock()   # only for creating books
+        self._by_id = {}
+        self._expiry = []       # heap of (entry timestamp, seq, trade_id)
+        self._index_lock = threading.Lock()   # guards _by_id and _expiry
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def book(self, asset):
+        book = self._books.get(asset)
+        if book is None:
+            with self._books_lock:
+                book = self._books.setdefault(asset, AssetBook(asset))
+        return book
+
+    # -----------------
+    # Insertion / placement
+    # -----------------
+    def add(self, trade):
+        book = self.book(trade.currency_pair)
+        with book.lock:
+            book.unresolved[trade.id] = trade
+            book.by_level[trade.level] = trade
+        with self._index_lock:
+            self._by_id[trade.id] = trade
+            heapq.heappush(self._expiry, (trade.entry_dt.timestamp(), next(self._seq), trade.id))
+
+    def mark_placed(self, trade, placed_at):
+        book = self.book(trade.currency_pair)
+        with book.lock:
+            trade.placed_at = placed_at
+            if not trade.resolved:
+                book.open.append(trade)
+
+    # -----------------
+    # Martingale increases
+    # -----------------
+    def record_increase(self, trade):
+        book = self.book(trade.currency_pair)
+        with book.lock:
+            trade.increase_count += 1
+            book.increase_count += 1
+
+    def undo_increase(self, trade):
+        """Take back a recorded increase whose trade was never placed (the caller sends the reset)."""
+        book = self.book(trade.currency_pair)
+        with book.lock:
+            trade.increase_count = max(0, trade.increase_count - 1)
+            book.increase_count = max(0, book.increase_count - 1)
+
+    def take_increases(self, asset):
+        """Zero the asset's increase count and return how many resets are owed."""
+        book = self.book(asset)
+        with book.lock:
+            n, book.increase_count = book.increase_count, 0
+            return n
+
+    # -----------------
+    # Lookups
+    # -----------------
+    def get(self, trade_id):
+        return self._by_id.get(trade_id)
+
+    def base_won(self, asset):
+        base = self.book(asset).by_level.get(0)
+        return bool(base and base.resolved and base.result is TradeResult.WIN)
+
+    def recent(self, n=10):
+        """Last `n` resolved trades, newest first."""
+        return list(itertools.islice(reversed(list(self.history)), n))
+
+    def open_assets(self):
+        """Assets with at least one placed trade still awaiting a result."""
+        return [asset for asset, book in list(self._books.items()) if book.open]
+
+    # -----------------
+    # Resolution
+    # -----------------
+    def resolve_next(self, asset, result):
+        """Resolve the oldest placed, unresolved trade for `asset`. Returns it or None."""
+        book = self.book(asset)
+        with book.lock:
+            if not book.open:
+                return None
+            trade = book.open.popleft()
+            self._mark_resolved(book, trade, result)
+            return trade
+
+    def resolve(self, trade_id, result):
+        """Resolve one specific unresolved trade. Returns it or None."""
+        trade = self.get(trade_id)
+        if trade is None:
+            return None
+        book = self.book(trade.currency_pair)
+        with book.lock:
+            if trade.resolved:
+                return None
+            self._mark_resolved(book, trade, result)
+            return trade
+
+    def resolve_open(self, asset, result, chain=None):
+        """
+        Resolve every unresolved trade for `asset` (placed or not), only those of
+        one signal's chain if given. Returns them.
+        """
+        book = self.book(asset)
+        with book.lock:
+            pending = [t for t in book.unresolved.values() if chain is None or t.chain == chain]
+            for trade in pending:
+                self._mark_resolved(book, trade, result)
+            return pending
+
+    def _mark_resolved(self, book, trade, result):
+        trade.resolved = True
+        trade.result = result
+        self.history.append(trade)
+        book.unresolved.pop(trade.id, None)
+        if trade in book.open:
+            book.open.remove(trade)
+
+    # -----------------
+    # Compaction
+    # -----------------
+    def compact(self, now_ts=None):
+        """
+        Drop trades older than max_age_seconds and enforce max_trades, oldest first.
+        Unresolved trades that age out are closed as EXPIRED. Returns the dropped trades.
+        """
+        now_ts = time.time() if now_ts is None else now_ts
+        cutoff = now_ts - self.max_age_seconds
+        dropped = []
+        with self._index_lock:
+            while self._expiry and (self._expiry[0][0] < cutoff or len(self._by_id) > self.max_trades):
+                _, _, trade_id = heapq.heappop(self._expiry)
+                trade = self._by_id.pop(trade_id, None)
+                if trade is not None:
+                    dropped.append(trade)
+
+        for trade in dropped:
+            book = self.book(trade.currency_pair)
+            with book.lock:
+                if not trade.resolved:
+                    self._mark_resolved(book, trade, TradeResult.EXPIRED)
+                if book.by_level.get(trade.level) is trade:
+                    del book.by_level[trade.level]
+        return dropped
@@ -0,0 +1,170 @@
+"""
+ui_state.py — cached model of what the trading UI currently shows.
+
+Keeps the current asset, timeframe and trade amount so detect_asset,
+select_asset and set_timeframe can answer from memory instead of the DOM.
+A MutationObserver on those three widgets bumps an in-page generation
+counter; refresh() (one execute_script, run by the result monitor every
+tick) only returns the widget texts when that counter moved.
+
+The cache is trusted while the last refresh is younger than max_age. Our own
+successful switches update it immediately (note_asset / note_timeframe);
+anything else that changes the widgets shows up on the next refresh.
+"""
+
+import logging
+import threading
+import time
+
+from models import normalize_asset
+
+logger = logging.getLogger(__name__)
+
+UI_STATE_MAX_AGE = 2.0  # seconds a refresh stays trustworthy
+
+UI_SELECTORS = {
+    "asset": ".asset-name-selector",
+    "timeframe": ".timeframe-selector .current",
+    "amount": ".block--bet-amount input, input[name='amount']",
+}
+
+# (Re-)installs the observer if a widget was replaced; returns texts only when the generation moved.
+WATCH_SCRIPT = """
+var since = arguments[0], sels = arguments[1];
+var ui = window.__poUi;
+var read = function (sel) {
+    var el = document.querySelector(sel);
+    if (!el) { return null; }
+    return (el.tagName === 'INPUT' ? el.value : el.textContent).trim();
+};
+var attached = function () {
+    for (var k in ui.nodes) {
+        if (!ui.nodes[k] || !document.contains(ui.nodes[k])) { return false; }
+    }
+    return true;
+};
+if (!ui || !attached()) {
+    if (ui && ui.observer) { ui.observer.disconnect(); }
+    ui = window.__poUi = {gen: ((ui && ui.gen) || 0) + 1, nodes: {}, observer: null, amount: null};
+    ui.observer = new MutationObserver(function () { ui.gen++; });
+    for (var k in sels) {
+        var el = document.querySelector(sels[k]);
+        ui.nodes[k] = el;
+        if (el) {
+            ui.observer.observe(el, {childList: true, characterData: true, subtree: true, attributes: true});
+        }
+    }
+}
+// typed/hotkey amount changes do not mutate the DOM, so compare the input value directly
+var amount = read(sels.amount);
+if (amount !== ui.amount) { ui.amount = amount; ui.gen++; }
+if (ui.gen === since) { return {gen: ui.gen}; }
+return {gen: ui.gen, asset: read(sels.asset), timeframe: read(sels.timeframe), amount: amount};
+"""
+
+
+class UiStateTracker:
+    def __init__(self, get_driver, max_age=UI_STATE_MAX_AGE):
+        self._get_driver = get_driver
+        self.max_age = max_age
+        self.asset = None
+        self.timeframe = None
+        self.amount = None
+        self.gen = None
+        self.refreshed_mono = None
+        self.hits = 0
+        self.misses = 0
+        self.skipped_switches = 0
+        self._epoch = 0  # bumped by our own writes; a refresh started before one is discarded
+        self._lock = threading.Lock()
+
+    # -----------------
+    # Observation
+    # -----------------
+    def refresh(self):
+        """One round-trip. Returns True if the UI changed since the previous refresh."""
+        with self._lock:
+            since, epoch = self.gen, self._epoch
+        try:
+            data = self._get_driver().execute_script(WATCH_SCRIPT, since, UI_SELECTORS) or {}
+        except Exception as e:
+            logger.debug(f"[⚠️] UI state refresh failed: {e}")
+            return False
+        with self._lock:
+            if epoch != self._epoch:
+                return False
+            self.refreshed_mono = time.monotonic()
+            if data.get("gen") == since:
+                return False
+            self.gen = data.get("gen")
+            self.asset = normalize_asset(data.get("asset")) or None
+            self.timeframe = (data.get("timeframe") or "").upper() or None
+            self.amount = _parse_amount(data.get("amount"))
+        logger.debug(f"[🖥️] UI now {self.asset} {self.timeframe} amount={self.amount}")
+        return True
+
+    def fresh(self):
+        return self.refreshed_mono is not None and time.monotonic() - self.refreshed_mono < self.max_age
+
+    def invalidate(self):
+        with self._lock:
+            self._epoch += 1
+            self.gen = None
+            self.refreshed_mono = None
+
+    # -----------------
+    # Queries: True/False from the cache, None if the caller must look at the DOM
+    # -----------------
+    def matches_asset(self, asset):
+        return self._match(self.asset, normalize_asset(asset))
+
+    def matches_timeframe(self, timeframe):
+        return self._match(self.timeframe, (timeframe or "").upper())
+
+    def _match(self, current, wanted):
+        with self._lock:
+            if current is None or not self.fresh():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return current == wanted
+
+    # -----------------
+    # Our own successful switches
+    # -----------------
+    def note_asset(self, asset):
+        self._note(asset=normalize_asset(asset))
+
+    def note_timeframe(self, timeframe):
+        self._note(timeframe=(timeframe or "").upper())
+
+    def _note(self, **values):
+        with self._lock:
+            self._epoch += 1
+            for key, value in values.items():
+                setattr(self, key, value)
+            self.refreshed_mono = time.monotonic()
+
+    def skipped_switch(self):
+        with self._lock:
+            self.skipped_switches += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "asset": self.asset,
+                "timeframe": self.timeframe,
+                "amount": self.amount,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "skipped_switches": self.skipped_switches,
+            }
+
+
+def _parse_amount(text):
+    try:
+        return float((text or "").replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
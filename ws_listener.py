@@ -0,0 +1,192 @@
+"""
+ws_listener.py — trade results and price ticks straight from the platform's WebSocket.
+
+Optional (WS_CAPTURE=1). Chrome is started with the performance log enabled
+(see performance_logging_options), which records CDP Network events including
+Network.webSocketFrameReceived. A single thread drains driver.get_log("performance")
+once per tick, decodes the socket.io frames and publishes typed events:
+
+    TickEvent(asset, ts, price)          from "updateStream"
+    ResultEvent(asset, result, profit,   from "successcloseOrder"
+                deal_id, ts)
+
+to a callback (TradeManager.on_market_event). This sees outcomes before they
+are rendered and does not depend on CSS class names.
+
+ws_standin.py serves a local page that emits scripted frames for testing.
+"""
+
+import base64
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from driver_owner import set_thread_priority, PRIORITY_MONITOR, MONITOR_STALE_SECONDS
+from models import normalize_asset
+
+logger = logging.getLogger(__name__)
+
+WS_CAPTURE = os.getenv("WS_CAPTURE", "0") == "1"
+WS_POLL_INTERVAL = 0.2   # seconds between performance-log drains
+WS_STALE_SECONDS = 120   # no frames for this long -> listener reported unhealthy
+
+_SIO_EVENT = re.compile(r"^(\d+)(-)?(\[.*\])$", re.S)
+
+
+@dataclass(frozen=True, slots=True)
+class TickEvent:
+    asset: str
+    ts: float
+    price: float
+
+
+@dataclass(frozen=True, slots=True)
+class ResultEvent:
+    asset: str
+    result: str
+    profit: float
+    deal_id: Optional[str]
+    ts: float
+
+
+def performance_logging_options(chrome_options):
+    """Turn on the CDP performance log (network events) for a ChromeOptions instance."""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    return chrome_options
+
+
+class FrameDecoder:
+    """Stateful socket.io frame decoder (binary placeholders are followed by a binary frame)."""
+
+    def __init__(self):
+        self._pending_binary_event = None
+
+    def decode(self, opcode, payload):
+        """Returns a list of TickEvent/ResultEvent for one WebSocket frame."""
+        if opcode == 2:
+            try:
+                text = base64.b64decode(payload).decode("utf-8", "replace")
+            except Exception:
+                return []
+            event, self._pending_binary_event = self._pending_binary_event, None
+            if not event:
+                return []
+            return self._to_events(event, _loads(text))
+
+        m = _SIO_EVENT.match(payload or "")
+        if not m:
+            return []
+        packet = _loads(m.group(3))
+        if not isinstance(packet, list) or not packet:
+            return []
+        event = packet[0]
+        data = packet[1] if len(packet) > 1 else None
+        if m.group(2) == "-" or (isinstance(data, dict) and data.get("_placeholder")):
+            self._pending_binary_event = event
+            return []
+        return self._to_events(event, data)
+
+    @staticmethod
+    def _to_events(event, data):
+        out = []
+        now = time.time()
+        if event == "updateStream" and isinstance(data, list):
+            for row in data:
+                if isinstance(row, list) and len(row) >= 3:
+                    try:
+                        out.append(TickEvent(normalize_asset(row[0]), float(row[1]), float(row[2])))
+                    except (TypeError, ValueError):
+                        continue
+        elif event == "successcloseOrder" and isinstance(data, dict):
+            for deal in data.get("deals") or []:
+                try:
+                    profit = float(deal.get("profit", 0))
+                except (TypeError, ValueError):
+                    continue
+                out.append(ResultEvent(
+                    normalize_asset(deal.get("asset")),
+                    "WIN" if profit > 0 else "LOSS",
+                    profit,
+                    str(deal.get("id")) if deal.get("id") is not None else None,
+                    now,
+                ))
+        return out
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except Exception:
+        return None
+
+
+class WebSocketListener:
+    def __init__(self, get_driver, publish, poll_interval=WS_POLL_INTERVAL):
+        self._get_driver = get_driver
+        self._publish = publish
+        self.poll_interval = poll_interval
+        self.decoder = FrameDecoder()
+        self.frames = 0
+        self.last_frame_mono = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self.attach()
+        self._thread = threading.Thread(target=self._run, name="ws-listener", daemon=True)
+        self._thread.start()
+        logger.info("[📡] WebSocket frame listener started.")
+
+    def attach(self):
+        """Enable network events on the current driver (again after a driver swap)."""
+        try:
+            self._get_driver().execute_cdp_cmd("Network.enable", {})
+        except Exception as e:
+            logger.debug(f"[⚠️] Network.enable failed (performance log may still work): {e}")
+
+    def stop(self):
+        self._running = False
+
+    def healthy(self):
+        return self.last_frame_mono is not None and time.monotonic() - self.last_frame_mono < WS_STALE_SECONDS
+
+    def drain(self):
+        """One get_log round-trip; decodes and publishes every buffered frame. Returns events."""
+        try:
+            entries = self._get_driver().get_log("performance")
+        except Exception as e:
+            logger.debug(f"[⚠️] performance log read failed: {e}")
+            return []
+        events = []
+        for entry in entries:
+            try:
+                msg = json.loads(entry["message"])["message"]
+            except Exception:
+                continue
+            if msg.get("method") != "Network.webSocketFrameReceived":
+                continue
+            frame = msg.get("params", {}).get("response", {})
+            self.frames += 1
+            self.last_frame_mono = time.monotonic()
+            events.extend(self.decoder.decode(frame.get("opcode"), frame.get("payloadData")))
+        for event in events:
+            try:
+                self._publish(event)
+            except Exception as e:
+                logger.error(f"[❌] Market event handler failed for {event}: {e}")
+        return events
+
+    def _run(self):
+        set_thread_priority(PRIORITY_MONITOR, stale_after=MONITOR_STALE_SECONDS)
+        while self._running:
+            self.drain()
+            time.sleep(self.poll_interval)
@@ -0,0 +1,126 @@
+"""
+ws_standin.py — local stand-in for the platform's WebSocket, to test ws_listener.py.
+
+Serves a page on http://127.0.0.1:<port>/ that opens a WebSocket to the same
+server, which then emits SCRIPTED_FRAMES (socket.io style, text + binary).
+
+    python ws_standin.py              # Chrome + CDP performance log, prints decoded events
+    python ws_standin.py --decode     # no browser: feed the scripted frames to the decoder
+"""
+
+import base64
+import hashlib
+import socket
+import struct
+import sys
+import threading
+import time
+
+from ws_listener import FrameDecoder, WebSocketListener, performance_logging_options
+
+PORT = 8765
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# (opcode, payload): 1 = text, 2 = binary
+SCRIPTED_FRAMES = [
+    (1, '451-["updateStream",{"_placeholder":true,"num":0}]'),
+    (2, b'[["EURUSD_otc",1700000000.125,1.08531],["GBPUSD",1700000000.130,1.26712]]'),
+    (1, '42["successcloseOrder",{"profit":1.85,"deals":[{"id":"d-1","asset":"EURUSD_otc","profit":1.85}]}]'),
+    (1, '42["successcloseOrder",{"profit":0,"deals":[{"id":"d-2","asset":"GBPUSD","profit":0}]}]'),
+]
+
+PAGE = f"""<!doctype html><html><body>stand-in
+<script>var ws = new WebSocket("ws://127.0.0.1:{PORT}/ws");</script>
+</body></html>"""
+
+
+def _frame(opcode, payload):
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 65536:
+        header += bytes([126]) + struct.pack(">H", n)
+    else:
+        header += bytes([127]) + struct.pack(">Q", n)
+    return header + payload
+
+
+def _handle(conn):
+    request = conn.recv(65536).decode("latin-1")
+    headers = dict(
+        line.split(": ", 1) for line in request.split("\r\n")[1:] if ": " in line
+    )
+    key = headers.get("Sec-WebSocket-Key")
+    if not key:
+        body = PAGE.encode()
+        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: "
+                     + str(len(body)).encode() + b"\r\n\r\n" + body)
+        conn.close()
+        return
+    accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+    conn.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+    for opcode, payload in SCRIPTED_FRAMES:
+        time.sleep(0.2)
+        conn.sendall(_frame(opcode, payload))
+    time.sleep(1)
+    conn.close()
+
+
+def serve(port=PORT):
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", port))
+    srv.listen(5)
+
+    def loop():
+        while True:
+            conn, _ = srv.accept()
+            threading.Thread(target=_handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=loop, daemon=True).start()
+    return srv
+
+
+def decode_only():
+    decoder = FrameDecoder()
+    for opcode, payload in SCRIPTED_FRAMES:
+        if opcode == 2:
+            payload = base64.b64encode(payload).decode()
+        for event in decoder.decode(opcode, payload):
+            print(event)
+
+
+def run_browser():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    serve()
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    performance_logging_options(options)
+    driver = webdriver.Chrome(service=Service("/usr/local/bin/chromedriver"), options=options)
+    try:
+        received = []
+        listener = WebSocketListener(lambda: driver, received.append)
+        driver.get(f"http://127.0.0.1:{PORT}/")
+        time.sleep(len(SCRIPTED_FRAMES) * 0.2 + 0.5)
+        listener.drain()
+        for event in received:
+            print(event)
+        print(f"[✅] {listener.frames} frames, {len(received)} events")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    if "--decode" in sys.argv:
+        decode_only()
+    else:
+        run_browser()